@@ -0,0 +1,118 @@
+import os
+import time
+import resource
+import threading
+from collections import deque
+
+"""
+* class MemoryBudget membatasi total memory buffer transfer yang sedang
+dipakai oleh semua request di server (atau di satu proses worker pada
+server multi-proses)
+
+* sebelum diproses, setiap request transfer memesan perkiraan memory
+yang akan dipakainya; jika budget tidak cukup, request menunggu di
+antrean FIFO sampai request lain selesai
+
+* antrean dibatasi: jika antrean penuh, atau request sudah menunggu
+terlalu lama, request ditolak dengan error beserta retry_after (detik)
+sebagai saran kapan client mencoba lagi
+
+* request yang lebih besar dari seluruh budget tetap dilayani, tetapi
+hanya saat tidak ada request lain yang sedang memakai budget
+"""
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None if unknown"""
+    try:
+        with open('/proc/self/statm') as fp:
+            return int(fp.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MemoryBudget:
+    def __init__(self, limit_bytes, max_waiters=64, max_wait=30.0):
+        self.limit = limit_bytes
+        self.max_waiters = max_waiters
+        self.max_wait = max_wait
+        self.cond = threading.Condition()
+        self.waiters = deque()
+        self.in_use = 0
+        self.holders = 0
+        self.peak = 0
+        self.admitted = 0
+        self.waited = 0
+        self.rejected = 0
+        # Smoothed time a reservation is held, for retry_after
+        self.hold_time = 1.0
+
+    def retry_after(self):
+        # Caller holds the lock: roughly how long until the queue has drained
+        estimate = self.hold_time * (len(self.waiters) + 1) / max(self.holders, 1)
+        return round(max(estimate, 0.1), 1)
+
+    def fits(self, nbytes):
+        return self.in_use + nbytes <= self.limit
+
+    def acquire(self, nbytes):
+        """Reserve nbytes, waiting in line while the budget is used up
+
+        Returns a token for release(). Raises BudgetExceeded when the
+        wait queue is full or the wait takes longer than max_wait.
+        """
+        nbytes = min(nbytes, self.limit)
+        with self.cond:
+            if not self.waiters and self.fits(nbytes):
+                return self.grant(nbytes)
+            if len(self.waiters) >= self.max_waiters:
+                self.rejected += 1
+                raise BudgetExceeded('Server busy: memory budget exhausted', self.retry_after())
+            ticket = object()
+            self.waiters.append(ticket)
+            self.waited += 1
+            deadline = time.monotonic() + self.max_wait
+            try:
+                while self.waiters[0] is not ticket or not self.fits(nbytes):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        raise BudgetExceeded('Server busy: timed out waiting for memory', self.retry_after())
+                    self.cond.wait(remaining)
+            finally:
+                self.waiters.remove(ticket)
+                # The next in line may fit now, or be first now
+                self.cond.notify_all()
+            return self.grant(nbytes)
+
+    def grant(self, nbytes):
+        # Caller holds the lock
+        self.in_use += nbytes
+        self.holders += 1
+        self.admitted += 1
+        self.peak = max(self.peak, self.in_use)
+        return (nbytes, time.monotonic())
+
+    def release(self, token):
+        nbytes, granted_at = token
+        with self.cond:
+            self.in_use -= nbytes
+            self.holders -= 1
+            self.hold_time = 0.8 * self.hold_time + 0.2 * (time.monotonic() - granted_at)
+            self.cond.notify_all()
+
+    def stats(self):
+        with self.cond:
+            data = dict(limit=self.limit, in_use=self.in_use, peak=self.peak, holders=self.holders,
+                        waiting=len(self.waiters), admitted=self.admitted, waited=self.waited,
+                        rejected=self.rejected)
+        data['rss'] = current_rss()
+        # ru_maxrss is in kilobytes on Linux
+        data['max_rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return data
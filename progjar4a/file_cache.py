@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict
+
+"""
+* class FileCache menyimpan isi file yang sering diminta di memory,
+dengan batas total byte (budget)
+
+* setiap entry divalidasi dengan ukuran, mtime dan inode file,
+sehingga file yang berubah di disk tidak pernah dilayani dari cache
+yang basi; FileInterface juga menghapus entry saat file di-upload
+atau di-delete
+
+* kebijakan eviction bisa dipilih: lru (paling lama tidak dipakai)
+atau lfu (paling jarang dipakai)
+"""
+
+CACHE_POLICIES = ('lru', 'lfu')
+
+
+class CacheEntry:
+    def __init__(self, size, mtime_ns, inode, content):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        # Names are hard links to blobs, so a new upload is a new inode
+        self.inode = inode
+        self.content = content
+        # Pre-encoded forms of the content, e.g. base64 for legacy GET
+        self.encoded = {}
+        self.hits = 0
+
+    def cost(self):
+        return len(self.content) + sum(len(value) for value in self.encoded.values())
+
+
+class FileCache:
+    def __init__(self, budget_bytes=256 * 1024 * 1024, policy='lru', max_entry_bytes=None, keep_encoded=True):
+        if policy not in CACHE_POLICIES:
+            raise ValueError(f"Unknown cache policy {policy}")
+        self.budget_bytes = budget_bytes
+        self.policy = policy
+        # A single file may use at most half the budget unless told otherwise
+        self.max_entry_bytes = max_entry_bytes if max_entry_bytes is not None else budget_bytes // 2
+        # Also keep pre-encoded response bodies (base64) next to the raw bytes
+        self.keep_encoded = keep_encoded
+        self.entries = OrderedDict()
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def accepts(self, size):
+        return size <= self.max_entry_bytes
+
+    def get(self, filename, st):
+        """Return the entry for filename if it still matches the file's stat"""
+        with self.lock:
+            entry = self.entries.get(filename)
+            if entry is not None and (entry.size, entry.mtime_ns, entry.inode) != (st.st_size, st.st_mtime_ns, st.st_ino):
+                # The file changed on disk since it was cached
+                self.drop(filename)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry.hits += 1
+            self.entries.move_to_end(filename)
+            return entry
+
+    def put(self, filename, st, content):
+        entry = CacheEntry(st.st_size, st.st_mtime_ns, st.st_ino, content)
+        if not self.accepts(entry.cost()):
+            return entry
+        with self.lock:
+            self.drop(filename)
+            self.entries[filename] = entry
+            self.used_bytes += entry.cost()
+            self.evict(keep=filename)
+        return entry
+
+    def add_encoded(self, filename, entry, name, value):
+        """Attach a pre-encoded form to a cached entry, within the budget"""
+        with self.lock:
+            if self.entries.get(filename) is not entry:
+                return
+            entry.encoded[name] = value
+            self.used_bytes += len(value)
+            self.evict(keep=filename)
+
+    def invalidate(self, filename):
+        with self.lock:
+            self.drop(filename)
+
+    def drop(self, filename):
+        # Caller holds the lock
+        entry = self.entries.pop(filename, None)
+        if entry is not None:
+            self.used_bytes -= entry.cost()
+
+    def evict(self, keep=None):
+        # Caller holds the lock. keep is the entry being added: under lfu it
+        # has no hits yet and would otherwise always be its own victim
+        while self.used_bytes > self.budget_bytes and self.entries:
+            candidates = (name for name in self.entries if name != keep)
+            if self.policy == 'lfu':
+                # min() keeps the first of equal counts: least recently used
+                victim = min(candidates, key=lambda name: self.entries[name].hits, default=keep)
+            else:
+                victim = next(candidates, keep)
+            self.drop(victim)
+            self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            return dict(policy=self.policy, budget_bytes=self.budget_bytes, used_bytes=self.used_bytes,
+                        entries=len(self.entries), hits=self.hits, misses=self.misses,
+                        evictions=self.evictions)
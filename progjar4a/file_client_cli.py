@@ -1,10 +1,25 @@
 import socket
-import json
 import base64
 import logging
 import time
 import struct
 import os
+import select
+import mmap
+import shlex
+import shutil
+import tarfile
+import fcntl
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from file_transfer import (SocketReader, IterReader, send_stream, send_chunked, CHUNKED_LENGTH, MAX_FRAME_SIZE,
+                           STREAM_CHUNK_SIZE)
+from file_store import hash_file
+from file_delta import DEFAULT_BLOCK_SIZE, compute_delta, encode_delta
+from file_compress import (COMPRESSION_CODECS, SAMPLE_SIZE, CompressedStream,
+                           StreamDecompressor, should_compress)
 
 server_address=('172.16.16.101', 8889)
 
@@ -12,8 +27,28 @@ server_address=('172.16.16.101', 8889)
 SOCKET_BUFFER_SIZE = 256 * 1024 * 1024  # 256MB buffer (balanced size)
 CHUNK_SIZE = 256 * 1024 * 1024  # 256MB chunks for file transfer
 
-def send_command(command_str="", binary_data=None):
+def read_part_version(version_path):
+    """Server file version a resumable .part file was downloaded from, or None"""
+    try:
+        with open(version_path) as fp:
+            return fp.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_part_version(version_path, version):
+    if version is None:
+        # Server without version tokens: the .part file cannot be resumed safely
+        if os.path.exists(version_path):
+            os.remove(version_path)
+        return
+    with open(version_path, 'w') as fp:
+        fp.write(version)
+
+
+def create_connection(address=None):
     global server_address
+    address = address or server_address
     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     
     # Optimize socket settings
@@ -27,49 +62,554 @@ def send_command(command_str="", binary_data=None):
     sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10)
     sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 6)
     
-    sock.connect(server_address)
-    logging.warning(f"connecting to {server_address}")
-    try:
-        # Send command length first (4 bytes)
-        command_bytes = command_str.encode()
-        command_length = len(command_bytes)
-        sock.sendall(struct.pack('!I', command_length))
-        
-        # Send command
-        sock.sendall(command_bytes)
-        
-        # If there's binary data to send
-        if binary_data:
-            # Send binary data length
-            data_length = len(binary_data)
-            sock.sendall(struct.pack('!I', data_length))
-            # Send binary data in chunks
-            total_sent = 0
-            while total_sent < data_length:
-                sent = sock.send(binary_data[total_sent:total_sent + CHUNK_SIZE])
-                if sent == 0:
-                    raise RuntimeError("Socket connection broken")
-                total_sent += sent
-            
-        # Look for the response
-        data_received = b""
+    sock.connect(address)
+    logging.warning(f"connecting to {address}")
+    return sock
+
+def send_request(sock, command_str="", binary_data=None):
+    # Send command length (4 bytes) and command in one write, so the
+    # server sees the whole command in the first segment
+    command_bytes = command_str.encode()
+    command_length = len(command_bytes)
+    sock.sendall(struct.pack('!I', command_length) + command_bytes)
+    
+    # If there's binary data to send
+    if binary_data is not None:
+        # Send binary data length
+        data_length = len(binary_data)
+        sock.sendall(struct.pack('!I', data_length))
+        # Send binary data in chunks
+        total_sent = 0
+        while total_sent < data_length:
+            sent = sock.send(binary_data[total_sent:total_sent + CHUNK_SIZE])
+            if sent == 0:
+                raise RuntimeError("Socket connection broken")
+            total_sent += sent
+
+
+class Connection:
+    """One client connection, with the reader that owns its receive buffer"""
+
+    def __init__(self, address):
+        self.address = address
+        self.sock = create_connection(address)
+        self.reader = SocketReader(self.sock)
+        self.last_used = time.monotonic()
+        self.reused = False
+
+    def read_response(self):
+        return self.reader.read_json()
+
+    def is_healthy(self):
+        # An idle connection must have nothing to read: readable means the
+        # server closed it (EOF) or sent something we never asked for
+        if self.reader.buffer:
+            return False
+        try:
+            readable, _, _ = select.select([self.sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class ConnectionPool:
+    """Persistent connections per server address
+
+    Idle connections are health-checked before reuse and evicted once
+    they have been idle longer than max_idle_time seconds.
+    """
+
+    def __init__(self, max_idle_per_address=8, max_idle_time=30.0):
+        self.max_idle_per_address = max_idle_per_address
+        self.max_idle_time = max_idle_time
+        self.idle = {}
+        self.lock = threading.Lock()
+
+    def evict_expired(self):
+        now = time.monotonic()
+        expired = []
+        with self.lock:
+            for address, connections in self.idle.items():
+                keep = []
+                for conn in connections:
+                    if now - conn.last_used > self.max_idle_time:
+                        expired.append(conn)
+                    else:
+                        keep.append(conn)
+                self.idle[address] = keep
+        for conn in expired:
+            conn.close()
+
+    def acquire(self, address):
+        self.evict_expired()
+        while True:
+            with self.lock:
+                connections = self.idle.get(address)
+                conn = connections.pop() if connections else None
+            if conn is None:
+                return Connection(address)
+            if conn.is_healthy():
+                conn.reused = True
+                return conn
+            conn.close()
+
+    def release(self, conn):
+        conn.last_used = time.monotonic()
+        with self.lock:
+            connections = self.idle.setdefault(conn.address, [])
+            if len(connections) < self.max_idle_per_address:
+                connections.append(conn)
+                return
+        conn.close()
+
+    def close_all(self):
+        with self.lock:
+            connections = [conn for conns in self.idle.values() for conn in conns]
+            self.idle = {}
+        for conn in connections:
+            conn.close()
+
+
+class FileClient:
+    """Client library for the file server
+
+    With a ConnectionPool, connections are kept open and reused between
+    commands; without one every command gets its own connection, like
+    the remote_* functions.
+    """
+
+    def __init__(self, address=None, pool=None):
+        self.address = address or server_address
+        self.pool = pool
+
+    def request(self, handler):
+        """Run handler(conn) on a connection, retrying once if a reused one went stale"""
+        for attempt in range(2):
+            conn = self.pool.acquire(self.address) if self.pool else Connection(self.address)
+            try:
+                result = handler(conn)
+            except (ConnectionError, OSError):
+                conn.close()
+                # A pooled connection may have been closed by the server while idle
+                if conn.reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            if self.pool:
+                self.pool.release(conn)
+            else:
+                conn.close()
+            return result
+
+    def send_command(self, command_str="", binary_data=None):
+        def handler(conn):
+            send_request(conn.sock, command_str, binary_data)
+            return conn.read_response()
+        return self.request(handler)
+
+    def list(self, pattern=None, limit=None, cursor=None):
+        """Plain LIST returns bare names; with a pattern, one page of entries"""
+        if pattern is None and limit is None and cursor is None:
+            return self.send_command("LIST")
+        command_str = f"LIST {pattern or '*'}"
+        if limit:
+            command_str += f" LIMIT {limit}"
+        if cursor:
+            command_str += f" CURSOR {cursor}"
+        return self.send_command(command_str)
+
+    def iter_list(self, pattern='*', limit=1000):
+        """Yield name/size/mtime entries of every matching file, page by page"""
+        cursor = None
         while True:
-            chunk = sock.recv(SOCKET_BUFFER_SIZE)
-            if chunk:
-                data_received += chunk
-                if b"\r\n\r\n" in data_received:
-                    break
+            hasil = self.list(pattern, limit, cursor)
+            if hasil['status'] != 'OK':
+                raise RuntimeError(hasil['data'])
+            yield from hasil['data']
+            cursor = hasil['data_next_cursor']
+            if cursor is None:
+                return
+
+    def delete(self, filename):
+        return self.send_command(f"DELETE {filename}")
+
+    def get(self, filename, output_path=None, resume=False, compress=None):
+        """RAW GET of filename into output_path
+
+        Data is written to a private temp file next to output_path and
+        renamed when complete, so concurrent downloads of the same file
+        never share a partial file. With resume=True the download is
+        staged in output_path + '.part' instead, and continues from its
+        size with a ranged GET; an exclusive lock on the .part file keeps
+        a second resuming download out (it falls back to a private temp
+        file). The server's file version is kept in .part.version, and a
+        .part file from another version is started over. A failed
+        download keeps its .part file for the next attempt. compress asks the server to compress the transfer with one
+        of COMPRESSION_CODECS; the server may still send incompressible
+        data as-is.
+        """
+        output_path = output_path or filename
+        part_path, fp = self.open_partial(output_path, resume)
+        # Only the shared .part file is resumable; a private temp file is not kept
+        version_path = part_path + '.version' if part_path == output_path + '.part' else None
+        try:
+            hasil = self.request(lambda conn: self.fetch_into(conn, filename, fp, compress, version_path))
+            if hasil['status'] == 'OK':
+                os.replace(part_path, output_path)
+                if version_path is not None and os.path.exists(version_path):
+                    os.remove(version_path)
+            elif version_path is None:
+                os.remove(part_path)
+            return hasil
+        except BaseException:
+            if version_path is None:
+                os.remove(part_path)
+            raise
+        finally:
+            # Closing also drops the lock on a resumable .part file
+            fp.close()
+
+    def open_partial(self, output_path, resume):
+        if resume:
+            part_path = output_path + '.part'
+            fd = os.open(part_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return part_path, open(fd, 'r+b')
+            except BlockingIOError:
+                # Another download is resuming into the same .part file
+                os.close(fd)
+        directory = os.path.dirname(os.path.abspath(output_path))
+        fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(output_path)}.", suffix='.part', dir=directory)
+        os.fchmod(fd, 0o644)
+        return temp_path, open(fd, 'r+b')
+
+    def fetch_into(self, conn, filename, fp, compress=None, version_path=None):
+        offset = fp.seek(0, os.SEEK_END)
+        expected_version = None
+        if offset and version_path is not None:
+            # Only resume onto bytes of the version the server has now
+            send_request(conn.sock, f"STAT {filename}")
+            current = conn.read_response()
+            expected_version = read_part_version(version_path)
+            if current['status'] == 'OK' and (expected_version is None or current.get('data_version') != expected_version):
+                fp.truncate(0)
+                offset = fp.seek(0)
+        # RAW mode: JSON header followed by the file bytes as a binary frame
+        send_request(conn.sock, f"GET {filename} RAW {offset}" + (f" COMPRESS {compress}" if compress else ""))
+        hasil = conn.read_response()
+        if hasil['status'] != 'OK':
+            if offset and hasil['data'].startswith('Invalid range'):
+                # The server copy shrank since the partial download: start over
+                fp.truncate(0)
+                return self.fetch_into(conn, filename, fp, compress, version_path)
+            return hasil
+        if version_path is not None:
+            if offset and hasil.get('data_version') != expected_version:
+                # Replaced between the STAT and the GET: the frame that follows
+                # is from the new version, so drop the connection and start over
+                fp.truncate(0)
+                raise ConnectionError(f"{filename} changed on the server while resuming")
+            write_part_version(version_path, hasil.get('data_version'))
+        if 'data_file' in hasil:
+            # Server without RAW/range support answered with the whole file in base64
+            fp.seek(0)
+            fp.truncate()
+            fp.write(base64.b64decode(hasil['data_file']))
+        elif hasil.get('data_encoding') in COMPRESSION_CODECS:
+            decoder = StreamDecompressor(hasil['data_encoding'])
+            for chunk in conn.reader.iter_chunked():
+                fp.write(decoder.decode(chunk))
+            fp.write(decoder.flush())
+            hasil['data_compression'] = decoder.report.as_dict()
+        else:
+            # Write chunks straight to disk as they arrive
+            for chunk in conn.reader.iter_frame():
+                fp.write(chunk)
+        fp.flush()
+        return hasil
+
+    def stat(self, filename):
+        return self.send_command(f"STAT {filename}")
+
+    def get_segmented(self, filename, output_path=None, streams=4):
+        """Download one file as `streams` ranged GETs running concurrently
+
+        The output is preallocated and every segment is written at its own
+        position with os.pwrite, so segments can complete in any order.
+        Give the client a ConnectionPool so the streams reuse connections.
+        """
+        output_path = output_path or filename
+        hasil = self.stat(filename)
+        if hasil['status'] != 'OK':
+            return hasil
+        size = hasil['data_size']
+        version = hasil.get('data_version')
+        # Private temp file: concurrent downloads of the same file must not share it
+        fd, part_path = tempfile.mkstemp(prefix=f".{os.path.basename(output_path)}.", suffix='.part',
+                                         dir=os.path.dirname(os.path.abspath(output_path)))
+        try:
+            os.fchmod(fd, 0o644)
+            # Preallocate so the positional writes never extend the file
+            if hasattr(os, 'posix_fallocate') and size > 0:
+                os.posix_fallocate(fd, 0, size)
             else:
-                break
-                
-        hasil = json.loads(data_received.decode())
+                os.ftruncate(fd, size)
+
+            # A ranged GET answers with one frame, so no segment may exceed it
+            segment_size = min(-(-size // streams), MAX_FRAME_SIZE) if size else 0
+            segments = [(offset, min(segment_size, size - offset))
+                        for offset in range(0, size, segment_size or 1)]
+
+            def fetch_segment(segment):
+                offset, length = segment
+
+                def handler(conn):
+                    send_request(conn.sock, f"GET {filename} RAW {offset} {length}")
+                    part = conn.read_response()
+                    if part['status'] != 'OK':
+                        return part
+                    position = offset
+                    for chunk in conn.reader.iter_frame():
+                        os.pwrite(fd, chunk, position)
+                        position += len(chunk)
+                    return part
+                return self.request(handler)
+
+            with ThreadPoolExecutor(max_workers=streams) as executor:
+                results = list(executor.map(fetch_segment, segments))
+        except BaseException:
+            os.remove(part_path)
+            raise
+        finally:
+            os.close(fd)
+
+        failed = [part for part in results if part['status'] != 'OK']
+        # The server clamps ranges: a file that changed since the STAT would
+        # leave zero-filled holes or mix two versions
+        changed = [part for part, (_, length) in zip(results, segments)
+                   if part['status'] == 'OK' and (part['data_size'] != length or part['data_total'] != size
+                                                  or part.get('data_version') != version)]
+        if failed or changed:
+            os.remove(part_path)
+            if failed:
+                return failed[0]
+            return dict(status='ERROR', data=f'{filename} changed on the server during the download')
+        os.replace(part_path, output_path)
+        return dict(status='OK', data_namafile=filename, data_size=size, data_streams=len(segments))
+
+    def upload_parallel(self, filepath, filename=None, streams=4, part_size=8 * 1024 * 1024, retries=3):
+        """Upload one file as parts sent concurrently over separate connections
+
+        The server writes every part in place (UPLOAD_PART) and assembles
+        nothing until UPLOAD_COMPLETE. A failed part is retried on its own,
+        up to `retries` times, instead of restarting the whole file.
+        """
+        filename = filename or os.path.basename(filepath)
+        size = os.path.getsize(filepath)
+        hasil = self.send_command(f"UPLOAD_INIT {filename} {size} {part_size}")
+        if hasil['status'] != 'OK':
+            return hasil
+        upload_id = hasil['upload_id']
+        part_size = hasil['part_size']
+
+        def send_part(index):
+            offset = index * part_size
+            length = min(part_size, size - offset)
+
+            def handler(conn):
+                send_request(conn.sock, f"UPLOAD_PART {upload_id} {index}")
+                with open(filepath, 'rb') as fp:
+                    fp.seek(offset)
+                    send_stream(conn.sock, fp, length, use_sendfile=True)
+                return conn.read_response()
+
+            for attempt in range(retries + 1):
+                try:
+                    part = self.request(handler)
+                except (ConnectionError, OSError) as e:
+                    part = dict(status='ERROR', data=str(e))
+                if part['status'] == 'OK':
+                    return part
+                logging.warning(f"part {index} of {filename} failed (attempt {attempt + 1}): {part['data']}")
+            return part
+
+        with ThreadPoolExecutor(max_workers=streams) as executor:
+            results = list(executor.map(send_part, range(hasil['parts'])))
+
+        failed = [part for part in results if part['status'] != 'OK']
+        if failed:
+            self.send_command(f"UPLOAD_ABORT {upload_id}")
+            return failed[0]
+        return self.send_command(f"UPLOAD_COMPLETE {upload_id}")
+
+    def upload_delta(self, filepath, filename=None, block_size=DEFAULT_BLOCK_SIZE):
+        """Update filename on the server by sending only what changed
+
+        The server's block signatures are matched against the local file
+        and only block references and new bytes are sent. Falls back to
+        a plain upload when the server has no copy yet.
+        """
+        filename = filename or os.path.basename(filepath)
+        hasil = self.send_command(f"SIGNATURES {filename} {block_size}")
+        if hasil['status'] != 'OK':
+            return self.upload(filepath, filename)
+        digest = hash_file(filepath)
+
+        def handler(conn):
+            with open(filepath, 'rb') as fp:
+                size = os.fstat(fp.fileno()).st_size
+                data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+                try:
+                    view = memoryview(data)
+                    ops = compute_delta(view, hasil['data_blocks'], block_size, hasil['data_size'])
+                    send_request(conn.sock, f"DELTA {filename} {block_size} SHA256 {digest}")
+                    conn.sock.sendall(struct.pack('!I', CHUNKED_LENGTH))
+                    send_chunked(conn.sock, encode_delta(view, ops))
+                    view.release()
+                finally:
+                    if size:
+                        data.close()
+            return conn.read_response()
+        return self.request(handler)
+
+    def mget(self, patterns, output_dir='.'):
+        """Fetch many files in one request, unpacking the tar stream as it arrives
+
+        patterns is a file name, a glob pattern, or a list of either.
+        """
+        if isinstance(patterns, str):
+            patterns = [patterns]
+
+        def handler(conn):
+            send_request(conn.sock, "MGET " + " ".join(shlex.quote(p) for p in patterns))
+            hasil = conn.read_response()
+            if hasil['status'] != 'OK':
+                return hasil
+            reader = IterReader(conn.reader.iter_chunked())
+            saved = []
+            with tarfile.open(fileobj=reader, mode='r|') as tar:
+                for member in tar:
+                    if not member.isfile():
+                        continue
+                    # Never let an archive entry write outside output_dir
+                    name = os.path.basename(member.name)
+                    with open(os.path.join(output_dir, name), 'wb') as fp:
+                        shutil.copyfileobj(tar.extractfile(member), fp, STREAM_CHUNK_SIZE)
+                    saved.append(name)
+            # Keep the connection in sync for the next request
+            reader.drain()
+            hasil['data_saved'] = saved
+            return hasil
+        return self.request(handler)
+
+    def pipeline(self, command_strs, window=32, on_response=None):
+        """Send commands without waiting for each response
+
+        Every command is tagged "#<index>" and the responses are matched
+        back by request_id, so they may arrive in any order. At most
+        `window` requests are outstanding at once. on_response(conn, hasil)
+        runs as each response arrives, e.g. to read a RAW GET frame.
+        Returns the responses in command order.
+        """
+        def handler(conn):
+            slots = threading.Semaphore(window)
+            results = [None] * len(command_strs)
+
+            def sender():
+                # Runs in its own thread so that a large burst cannot
+                # deadlock with the responses we are not reading yet
+                try:
+                    for request_id, command_str in enumerate(command_strs):
+                        slots.acquire()
+                        send_request(conn.sock, f"#{request_id} {command_str}")
+                except OSError as e:
+                    logging.warning(f"error during pipelined send: {str(e)}")
+
+            send_thread = threading.Thread(target=sender, daemon=True)
+            send_thread.start()
+            for _ in range(len(command_strs)):
+                hasil = conn.read_response()
+                if on_response is not None:
+                    on_response(conn, hasil)
+                results[int(hasil['request_id'])] = hasil
+                slots.release()
+            send_thread.join()
+            return results
+        return self.request(handler)
+
+    def get_many(self, filenames, output_dir='.', window=32):
+        """Pipelined RAW GET of many files over one connection"""
+        def save_file(conn, hasil):
+            if hasil['status'] != 'OK':
+                return
+            with open(os.path.join(output_dir, hasil['data_namafile']), 'wb') as fp:
+                for chunk in conn.reader.iter_frame():
+                    fp.write(chunk)
+        return self.pipeline([f"GET {filename} RAW" for filename in filenames], window, save_file)
+
+    def upload(self, filepath, filename=None, raw=True, dedup=False, compress=None):
+        """Upload a file; with dedup, content the server already has is only linked
+
+        compress compresses a RAW upload with one of COMPRESSION_CODECS,
+        unless the first block of the file turns out to be incompressible.
+        """
+        filename = filename or os.path.basename(filepath)
+        digest = None
+        if dedup:
+            digest = hash_file(filepath)
+            hasil = self.send_command(f"LINK {filename} {digest}")
+            if hasil['status'] == 'OK':
+                return hasil
+        # The digest lets the server verify the data it stored
+        checksum = f" SHA256 {digest}" if digest else ""
+        if not raw:
+            # Legacy base64 upload
+            with open(filepath, 'rb') as fp:
+                binary_data = base64.b64encode(fp.read())
+            return self.send_command(f"UPLOAD {filename}{checksum}", binary_data)
+
+        if compress:
+            with open(filepath, 'rb') as fp:
+                if not should_compress(fp.read(SAMPLE_SIZE), compress):
+                    compress = None
+
+        # RAW mode: the file bytes go on the wire unencoded, straight from disk
+        def handler(conn):
+            with open(filepath, 'rb') as fp:
+                file_size = os.fstat(fp.fileno()).st_size
+                if compress:
+                    # Compressed size is unknown up front: send a chunked payload
+                    send_request(conn.sock, f"UPLOAD {filename} RAW COMPRESS {compress}{checksum}")
+                    conn.sock.sendall(struct.pack('!I', CHUNKED_LENGTH))
+                    send_chunked(conn.sock, CompressedStream(fp, file_size, compress).iter_chunks())
+                elif file_size > MAX_FRAME_SIZE:
+                    # Too large for one frame: checked before the command is sent
+                    return dict(status='ERROR', data=f'{filename} is larger than the {MAX_FRAME_SIZE} bytes '
+                                                     f'of one frame')
+                else:
+                    send_request(conn.sock, f"UPLOAD {filename} RAW{checksum}")
+                    send_stream(conn.sock, fp, file_size, use_sendfile=True)
+            return conn.read_response()
+        return self.request(handler)
+
+
+def send_command(command_str="", binary_data=None):
+    try:
+        hasil = FileClient(server_address).send_command(command_str, binary_data)
         logging.warning("data received from server:")
         return hasil
     except Exception as e:
         logging.warning(f"error during data receiving: {str(e)}")
         return False
-    finally:
-        sock.close()
 
 def remote_list():
     command_str = "LIST"
@@ -83,21 +623,20 @@ def remote_list():
         print("Gagal")
         return False
 
-def remote_get(filename=""):
-    command_str = f"GET {filename}"
-    hasil = send_command(command_str)
+def remote_get(filename="", resume=True):
+    try:
+        # A failed download leaves <name>.part behind to resume from
+        hasil = FileClient(server_address).get(filename, resume=resume)
+    except Exception as e:
+        logging.warning(f"error during data receiving: {str(e)}")
+        return False
     if (hasil['status']=='OK'):
-        namafile = hasil['data_namafile']
-        # Decode base64 string back to binary
-        isifile = base64.b64decode(hasil['data_file'])
-        with open(namafile, 'wb') as fp:
-            fp.write(isifile)
         return True
     else:
         print("Gagal")
         return False
 
-def remote_upload(filename=""):
+def remote_upload(filename="", raw=True, dedup=False, delta=False):
     try:
         # Get full path of the file in the files directory
         filepath = os.path.join("./files", filename)
@@ -107,18 +646,12 @@ def remote_upload(filename=""):
             print(f"File {filename} tidak ditemukan di direktori files")
             return False
             
-        # Read file content in binary mode and encode to base64
-        with open(filepath, 'rb') as fp:
-            file_content = fp.read()
-            # Encode to base64 in chunks to reduce memory usage
-            file_content_b64 = base64.b64encode(file_content).decode()
-        
-        # Convert base64 string back to binary for sending
-        binary_data = file_content_b64.encode()
-        
-        # Send command and binary data
-        command_str = f"UPLOAD {filename}"
-        hasil = send_command(command_str, binary_data)
+        client = FileClient(server_address)
+        if delta:
+            # Only the blocks that changed since the server's copy are sent
+            hasil = client.upload_delta(filepath, filename)
+        else:
+            hasil = client.upload(filepath, filename, raw=raw, dedup=dedup)
         if (hasil['status']=='OK'):
             print(f"File {filename} berhasil diupload")
             return True
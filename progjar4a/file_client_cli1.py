@@ -5,6 +5,8 @@ import logging
 import time
 import struct
 
+from file_transfer import SocketReader
+
 server_address=('0.0.0.0',7777)
 
 def send_command(command_str="", binary_data=None):
@@ -30,17 +32,7 @@ def send_command(command_str="", binary_data=None):
             sock.sendall(binary_data)
             
         # Look for the response
-        data_received = ""
-        while True:
-            data = sock.recv(1024)
-            if data:
-                data_received += data.decode()
-                if "\r\n\r\n" in data_received:
-                    break
-            else:
-                break
-                
-        hasil = json.loads(data_received)
+        hasil = SocketReader(sock).read_json()
         logging.warning("data received from server:")
         return hasil
     except Exception as e:
@@ -0,0 +1,148 @@
+import bz2
+import lzma
+import time
+import zlib
+
+"""
+* modul file_compress berisi kompresi per transfer untuk GET dan UPLOAD
+dengan codec dari standard library: zlib, lzma dan bz2
+
+* data dikompresi/didekompresi per chunk sehingga file besar tidak
+pernah dimuat utuh ke memory
+
+* sebelum mengompresi, blok pertama data dicoba dikompresi terlebih
+dahulu; data yang tidak bisa dikecilkan (jpg, pdf, data acak) dikirim
+apa adanya tanpa membuang CPU
+
+* setiap transfer mencatat rasio kompresi dan waktu CPU yang dipakai
+"""
+
+COMPRESSION_CODECS = ('zlib', 'lzma', 'bz2')
+
+# Size of the first block that is test-compressed to detect incompressible data
+SAMPLE_SIZE = 64 * 1024  # 64KB
+# Data is only compressed if the sample shrinks to at most this fraction
+MAX_SAMPLE_RATIO = 0.9
+
+# Uncompressed bytes fed to the compressor per chunk
+COMPRESS_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# Approximate working memory of each compressor at the levels used below
+CODEC_MEMORY = {
+    'zlib': 256 * 1024,
+    'lzma': 16 * 1024 * 1024,
+    'bz2': 8 * 1024 * 1024,
+}
+
+
+def make_compressor(codec):
+    if codec == 'zlib':
+        return zlib.compressobj(6)
+    if codec == 'lzma':
+        # Low preset: fast enough to keep up with the network
+        return lzma.LZMACompressor(preset=1)
+    if codec == 'bz2':
+        return bz2.BZ2Compressor(9)
+    raise ValueError(f'Unknown compression codec {codec}')
+
+
+def make_decompressor(codec):
+    if codec == 'zlib':
+        return zlib.decompressobj()
+    if codec == 'lzma':
+        return lzma.LZMADecompressor()
+    if codec == 'bz2':
+        return bz2.BZ2Decompressor()
+    raise ValueError(f'Unknown compression codec {codec}')
+
+
+def should_compress(sample, codec):
+    """Test-compress the first block and decide whether compression pays off"""
+    if not sample:
+        return False
+    compressor = make_compressor(codec)
+    compressed = compressor.compress(sample) + compressor.flush()
+    return len(compressed) <= len(sample) * MAX_SAMPLE_RATIO
+
+
+class CompressionReport:
+    """Bytes in/out and CPU time of one compressed transfer"""
+
+    def __init__(self, codec):
+        self.codec = codec
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_time = 0.0
+
+    def ratio(self):
+        return self.bytes_out / self.bytes_in if self.bytes_in else 1.0
+
+    def as_dict(self):
+        return dict(codec=self.codec, bytes=self.bytes_in, wire_bytes=self.bytes_out,
+                    ratio=round(self.ratio(), 4), cpu_ms=round(self.cpu_time * 1000, 3))
+
+
+class CompressedStream:
+    """Compress length bytes of a stream chunk by chunk
+
+    The CPU time is measured with thread_time, so concurrent transfers
+    in other threads are not counted. on_done(report) is called with
+    the CompressionReport once the last chunk has been produced.
+    """
+
+    def __init__(self, stream, length, codec, on_done=None):
+        self.stream = stream
+        self.length = length
+        self.compressor = make_compressor(codec)
+        self.report = CompressionReport(codec)
+        self.on_done = on_done
+
+    def iter_chunks(self, chunk_size=COMPRESS_CHUNK_SIZE):
+        remaining = self.length
+        while remaining > 0:
+            data = self.stream.read(min(chunk_size, remaining))
+            if not data:
+                raise RuntimeError("File truncated while sending")
+            remaining -= len(data)
+            start = time.thread_time()
+            compressed = self.compressor.compress(data)
+            self.report.cpu_time += time.thread_time() - start
+            self.report.bytes_in += len(data)
+            if compressed:
+                self.report.bytes_out += len(compressed)
+                yield compressed
+        start = time.thread_time()
+        compressed = self.compressor.flush()
+        self.report.cpu_time += time.thread_time() - start
+        self.report.bytes_out += len(compressed)
+        if compressed:
+            yield compressed
+        if self.on_done is not None:
+            self.on_done(self.report)
+
+    def close(self):
+        self.stream.close()
+
+
+class StreamDecompressor:
+    """Decoder for upload payloads that undoes a compressed stream"""
+
+    def __init__(self, codec):
+        self.decompressor = make_decompressor(codec)
+        self.report = CompressionReport(codec)
+
+    def decode(self, chunk):
+        start = time.thread_time()
+        data = self.decompressor.decompress(chunk)
+        self.report.cpu_time += time.thread_time() - start
+        self.report.bytes_out += len(chunk)
+        self.report.bytes_in += len(data)
+        return data
+
+    def flush(self):
+        # Only zlib keeps output back until flush(); lzma and bz2 have none
+        data = self.decompressor.flush() if hasattr(self.decompressor, 'flush') else b''
+        if not self.decompressor.eof:
+            raise ValueError("Incomplete compressed data")
+        self.report.bytes_in += len(data)
+        return data
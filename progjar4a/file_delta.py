@@ -0,0 +1,195 @@
+import os
+import zlib
+import struct
+import hashlib
+
+"""
+* modul file_delta berisi algoritma delta-sync ala rsync untuk meng-update
+file besar yang hanya sedikit berubah
+
+* server membagi file lamanya menjadi blok berukuran tetap dan mengirim
+signature setiap blok: checksum lemah (adler32, bisa digeser per byte)
+dan hash kuat (blake2b)
+
+* client mencari blok-blok tersebut di file barunya dan hanya mengirim
+operasi delta: salin blok dari file lama (C) atau byte literal baru (L)
+
+* server menyusun file baru dari file lama dan operasi delta ke file
+sementara, lalu menggantinya secara atomik
+"""
+
+DEFAULT_BLOCK_SIZE = 64 * 1024  # 64KB
+MIN_BLOCK_SIZE = 512
+MAX_BLOCK_SIZE = 8 * 1024 * 1024  # 8MB
+
+# Delta ops: b'C' + !II (first block, block count) copies blocks of the old
+# file, b'L' + !I (length) is followed by that many literal bytes
+OP_COPY = ord('C')
+OP_LITERAL = ord('L')
+COPY_HEADER = struct.Struct('!BII')
+LITERAL_HEADER = struct.Struct('!BI')
+
+# Largest literal op and encoded chunk produced by the client
+MAX_LITERAL = 1024 * 1024  # 1MB
+
+ADLER_MOD = 65521
+
+
+def weak_checksum(data):
+    return zlib.adler32(data)
+
+
+def strong_checksum(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def block_signatures(fp, block_size):
+    """[weak, strong] for every block of fp, the last one possibly shorter"""
+    signatures = []
+    for block in iter(lambda: fp.read(block_size), b''):
+        signatures.append([weak_checksum(block), strong_checksum(block)])
+    return signatures
+
+
+def compute_delta(view, signatures, block_size, basis_size):
+    """Yield ('copy', index) and ('literal', start, end) ops that rebuild view
+
+    Blocks are first tried at the position right after the previous
+    match, with zlib.adler32 doing the work in C; for unchanged regions
+    of the file this aligned fast path is all that runs. Only when a
+    block stops matching is the checksum rolled byte by byte (for up to
+    two blocks) to find where the old data continues after an insert or
+    delete. Each failed roll doubles the number of aligned blocks passed
+    before the next one, so an insert of any length is found again
+    within about its own length, while a completely new file costs only
+    a logarithmic number of rolled windows.
+    """
+    table = {}
+    for index, (weak, strong) in enumerate(signatures):
+        table.setdefault(weak, []).append((index, strong))
+
+    def match(start, end, weak):
+        candidates = table.get(weak)
+        if not candidates:
+            return None
+        strong = strong_checksum(view[start:end])
+        for index, candidate in candidates:
+            if candidate == strong and min(block_size, basis_size - index * block_size) == end - start:
+                return index
+        return None
+
+    def roll(start):
+        # Slide a block-sized window from start, one byte at a time
+        weak = weak_checksum(view[start:start + block_size])
+        a, b = weak & 0xffff, weak >> 16
+        for position in range(start, min(len(view) - block_size, start + 2 * block_size)):
+            out_byte, in_byte = view[position], view[position + block_size]
+            a = (a - out_byte + in_byte) % ADLER_MOD
+            b = (b - block_size * out_byte + a - 1) % ADLER_MOD
+            weak = (b << 16) | a
+            if weak in table and match(position + 1, position + 1 + block_size, weak) is not None:
+                return position + 1
+        return None
+
+    size = len(view)
+    position = literal_start = 0
+    # Aligned blocks to pass before the next roll, and the next such gap
+    skip, backoff = 0, 1
+    while position < size:
+        end = min(position + block_size, size)
+        index = match(position, end, weak_checksum(view[position:end]))
+        if index is not None:
+            if literal_start < position:
+                yield ('literal', literal_start, position)
+            yield ('copy', index)
+            position = literal_start = end
+            skip, backoff = 0, 1
+            continue
+        if end - position == block_size:
+            if skip == 0:
+                found = roll(position)
+                if found is not None:
+                    position = found
+                    continue
+                skip, backoff = backoff, backoff * 2
+            else:
+                skip -= 1
+        position = end
+    if literal_start < size:
+        yield ('literal', literal_start, size)
+
+
+def encode_delta(view, ops, chunk_size=MAX_LITERAL):
+    """Encode delta ops into byte chunks, merging runs of consecutive blocks"""
+    pending = bytearray()
+    run = None
+    for op in ops:
+        if op[0] == 'copy':
+            if run is not None and run[0] + run[1] == op[1]:
+                run[1] += 1
+                continue
+            if run is not None:
+                pending += COPY_HEADER.pack(OP_COPY, run[0], run[1])
+            run = [op[1], 1]
+            continue
+        if run is not None:
+            pending += COPY_HEADER.pack(OP_COPY, run[0], run[1])
+            run = None
+        for start in range(op[1], op[2], MAX_LITERAL):
+            end = min(start + MAX_LITERAL, op[2])
+            pending += LITERAL_HEADER.pack(OP_LITERAL, end - start)
+            pending += view[start:end]
+            if len(pending) >= chunk_size:
+                yield bytes(pending)
+                pending.clear()
+    if run is not None:
+        pending += COPY_HEADER.pack(OP_COPY, run[0], run[1])
+    if pending:
+        yield bytes(pending)
+
+
+def apply_delta(basis_fd, writer, block_size):
+    """Rebuild a file into writer from delta op chunks and the old file
+
+    A payload sink (see file_transfer.start_sink): the chunks are sent
+    in one by one, None ends them. Returns (copied, literal) byte counts.
+    """
+    basis_size = os.fstat(basis_fd).st_size
+    buffer = bytearray()
+    literal_remaining = 0
+    copied = literal = 0
+    while (chunk := (yield)) is not None:
+        buffer += chunk
+        while buffer:
+            if literal_remaining:
+                take = min(literal_remaining, len(buffer))
+                writer.write(bytes(buffer[:take]))
+                del buffer[:take]
+                literal_remaining -= take
+                literal += take
+            elif buffer[0] == OP_LITERAL:
+                if len(buffer) < LITERAL_HEADER.size:
+                    break
+                literal_remaining = LITERAL_HEADER.unpack_from(buffer)[1]
+                del buffer[:LITERAL_HEADER.size]
+            elif buffer[0] == OP_COPY:
+                if len(buffer) < COPY_HEADER.size:
+                    break
+                _, first, count = COPY_HEADER.unpack_from(buffer)
+                del buffer[:COPY_HEADER.size]
+                if count == 0 or first + count > -(-basis_size // block_size):
+                    raise ValueError(f'Delta copies blocks {first}+{count} past the end of the file')
+                offset = first * block_size
+                end = min((first + count) * block_size, basis_size)
+                while offset < end:
+                    data = os.pread(basis_fd, min(MAX_LITERAL, end - offset), offset)
+                    if not data:
+                        raise ValueError('File changed while applying delta')
+                    writer.write(data)
+                    offset += len(data)
+                    copied += len(data)
+            else:
+                raise ValueError(f'Invalid delta op {buffer[0]}')
+    if literal_remaining or buffer:
+        raise ValueError('Truncated delta')
+    return copied, literal
@@ -0,0 +1,179 @@
+import socket
+import logging
+import shlex
+import json
+import struct
+
+from file_budget import BudgetExceeded
+from file_transfer import (recv_exact, recv_length, send_stream, send_chunked, IncomingPayload, ChunkedPayload,
+                           CHUNKED_LENGTH, STREAM_CHUNK_SIZE)
+
+"""
+* class ProcessTheClient melayani satu koneksi client dan dipakai
+bersama oleh file_server, file_server_thread dan file_server_process
+
+* setiap request dibaca dalam format [4-byte length][command string],
+diteruskan ke FileProtocol, lalu hasilnya dikirim balik dalam bentuk
+JSON yang diakhiri "\r\n\r\n"
+
+* request diproses berurutan per koneksi, sehingga client boleh
+mengirim beberapa request sekaligus (pipelining) tanpa menunggu
+response; request yang diawali "#<id>" dijawab dengan request_id yang
+sama
+
+* untuk GET mode RAW, setelah header JSON isi file dikirim sebagai
+frame binary [4-byte length][data] yang dibaca dari disk per chunk,
+atau disalin langsung oleh kernel dengan sendfile jika diaktifkan;
+data yang dikompresi dikirim sebagai rangkaian frame yang diakhiri
+frame kosong
+"""
+
+# Commands that are followed by a length-prefixed binary payload
+PAYLOAD_COMMANDS = ('upload', 'upload_part', 'delta')
+
+# Configure socket buffer sizes to match client
+SOCKET_BUFFER_SIZE = 256 * 1024 * 1024  # 256MB buffer (balanced size)
+
+
+def parse_command(command_str):
+    """Split a command string into (request_id, command, filename, params)
+
+    A leading "#<id>" token tags a pipelined request; the id is echoed in
+    the response so the client can match it.
+    """
+    parts = shlex.split(command_str)
+    request_id = None
+    if parts and parts[0].startswith('#'):
+        request_id = parts[0][1:]
+        parts = parts[1:]
+    if not parts:
+        return request_id, None, '', []
+    command = parts[0]
+    filename = parts[1] if len(parts) > 1 else ''
+    return request_id, command, filename, parts[2:]
+
+
+class ProcessTheClient:
+    def __init__(self, connection, address, protocol, use_sendfile=True):
+        self.connection = connection
+        self.address = address
+        self.protocol = protocol
+        # Zero-copy GET via socket.sendfile (falls back to chunked send)
+        self.use_sendfile = use_sendfile
+        # Reusable receive buffer, so an upload never needs more than one chunk in memory
+        self.recv_buffer = bytearray(STREAM_CHUNK_SIZE)
+
+        # Optimize socket settings
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, struct.pack('i', SOCKET_BUFFER_SIZE))
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, struct.pack('i', SOCKET_BUFFER_SIZE))
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # Enable TCP keepalive
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        # Set TCP keepalive parameters
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 60)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 6)
+
+    def receive_all(self, length):
+        return recv_exact(self.connection, length)
+
+    def send_response(self, hasil):
+        # Streams are sent after the JSON header and never serialized
+        stream = hasil.pop('data_stream', None)
+        stats = self.protocol.stats
+        try:
+            if hasil.get('status') != 'OK':
+                stats.add('errors')
+            response = (json.dumps(hasil) + "\r\n\r\n").encode()
+            self.connection.sendall(response)
+            stats.add('bytes_sent', len(response))
+            if stream is not None and hasattr(stream, 'iter_chunks'):
+                # Compressed data and archives have no size up front: send them chunked
+                stats.add('bytes_sent', send_chunked(self.connection, stream.iter_chunks()))
+            elif stream is not None:
+                send_stream(self.connection, stream, hasil['data_size'], use_sendfile=self.use_sendfile)
+                stats.add('bytes_sent', 4 + hasil['data_size'])
+        finally:
+            if stream is not None:
+                stream.close()
+
+    def handle_client(self):
+        stats = self.protocol.stats
+        stats.add('connections')
+        stats.add('active_connections')
+        try:
+            self.serve_requests()
+        finally:
+            stats.add('active_connections', -1)
+            self.connection.close()
+
+    def serve_requests(self):
+        while self.serve_one():
+            pass
+
+    def serve_one(self):
+        """Read, process and answer one request
+
+        Returns False once the connection should be closed.
+        """
+        stats = self.protocol.stats
+        try:
+            # First receive the command string length (4 bytes)
+            command_length = recv_length(self.connection)
+            if command_length is None:
+                return False
+
+            # Receive the command string
+            command_data = self.receive_all(command_length)
+            if not command_data:
+                return False
+
+            stats.add('requests')
+            stats.add('bytes_received', 4 + command_length)
+            request_id, command, filename, params = parse_command(command_data.decode())
+            if command is None and request_id is None:
+                return True
+
+            # If it's an upload command, the file data is streamed to disk
+            # by FileInterface.upload straight from the socket
+            content = None
+            if command and command.lower() in PAYLOAD_COMMANDS:
+                # Receive file data length
+                file_length = recv_length(self.connection)
+                if file_length is None:
+                    return False
+                if file_length == CHUNKED_LENGTH:
+                    # Size unknown up front (e.g. compressed): counted once received
+                    content = ChunkedPayload(self.connection, self.recv_buffer)
+                    stats.add('bytes_received', 4)
+                else:
+                    content = IncomingPayload(self.connection, file_length, self.recv_buffer)
+                    stats.add('bytes_received', 4 + file_length)
+
+            # Transfer buffers are admitted against the memory budget first;
+            # the reservation lasts until the response has been sent
+            try:
+                reserved = self.protocol.admit(command or '', filename, params)
+                hasil = None
+            except BudgetExceeded as e:
+                reserved = None
+                hasil = dict(status='ERROR', data=str(e), retry_after=e.retry_after)
+            try:
+                if hasil is None:
+                    hasil = self.protocol.proses_string(command or '', filename, content, params)
+                if content is not None:
+                    # Skip any payload bytes the upload did not consume
+                    content.drain()
+                    if isinstance(content, ChunkedPayload):
+                        stats.add('bytes_received', content.received)
+                if request_id is not None:
+                    hasil['request_id'] = request_id
+                self.send_response(hasil)
+            finally:
+                self.protocol.release(reserved)
+            return True
+
+        except Exception as e:
+            stats.add('errors')
+            logging.error(f"Error processing client request: {str(e)}")
+            return False
@@ -0,0 +1,119 @@
+import os
+import time
+import bisect
+import fnmatch
+import threading
+
+"""
+* class DirectoryIndex menyimpan daftar file di direktori penyimpanan
+(nama, ukuran, mtime) di memory sehingga LIST tidak perlu membaca
+direktori setiap kali dipanggil
+
+* index dibaca ulang hanya jika direktori berubah (mtime direktori
+berubah, atau upload/delete memanggil invalidate); saat dibaca ulang
+hanya file baru atau yang inode-nya berubah yang di-stat, karena upload
+selalu mengganti file lewat rename (inode baru)
+
+* file tersembunyi (diawali ".") seperti blob, index dan file sementara
+tidak ikut ditampilkan
+"""
+
+
+class DirectoryIndex:
+    def __init__(self, directory='.', max_age=2.0, max_patterns=64):
+        self.directory = directory
+        # Rescan at least this often, in case a change kept the directory mtime
+        self.max_age = max_age
+        self.max_patterns = max_patterns
+        self.entries = {}
+        self.names = []
+        # Sorted matching names per pattern, valid until the next rescan
+        self.matches = {}
+        self.dir_mtime_ns = None
+        self.scanned_at = 0.0
+        self.stale = True
+        self.lock = threading.Lock()
+
+    def invalidate(self):
+        self.stale = True
+
+    def refresh(self):
+        with self.lock:
+            dir_mtime_ns = os.stat(self.directory).st_mtime_ns
+            if (not self.stale and dir_mtime_ns == self.dir_mtime_ns
+                    and time.monotonic() - self.scanned_at < self.max_age):
+                return
+            # Cleared before scanning: a change made during the scan marks it stale again
+            self.stale = False
+            self.dir_mtime_ns = dir_mtime_ns
+            self.scanned_at = time.monotonic()
+            entries = {}
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.startswith('.') or not entry.is_file(follow_symlinks=False):
+                        continue
+                    known = self.entries.get(entry.name)
+                    if known is not None and known[0] == entry.inode():
+                        entries[entry.name] = known
+                        continue
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+                    entries[entry.name] = (st.st_ino, st.st_size, st.st_mtime)
+            self.entries = entries
+            self.names = sorted(entries)
+            self.matches = {}
+
+    def match(self, pattern):
+        # Caller holds the lock
+        if pattern == '*':
+            return self.names
+        names = self.matches.get(pattern)
+        if names is None:
+            names = [name for name in self.names if fnmatch.fnmatchcase(name, pattern)]
+            if len(self.matches) >= self.max_patterns:
+                self.matches.clear()
+            self.matches[pattern] = names
+        return names
+
+    def all_names(self):
+        self.refresh()
+        return self.names
+
+    def find(self, patterns):
+        """Sorted (name, size) of files matching any of the patterns or exact names
+
+        Also returns the exact names that do not exist.
+        """
+        self.refresh()
+        names = set()
+        missing = []
+        with self.lock:
+            all_entries = self.entries
+            for pattern in patterns:
+                if any(c in pattern for c in '*?['):
+                    names.update(self.match(pattern))
+                elif pattern in all_entries:
+                    names.add(pattern)
+                else:
+                    missing.append(pattern)
+        return [(name, all_entries[name][1]) for name in sorted(names)], missing
+
+    def page(self, pattern='*', limit=1000, after=None):
+        """Entries matching pattern, sorted by name, starting after the name `after`
+
+        Returns (entries, last name or None when there are no more, total matches).
+        """
+        self.refresh()
+        with self.lock:
+            all_entries = self.entries
+            names = self.match(pattern)
+        start = bisect.bisect_right(names, after) if after is not None else 0
+        selected = names[start:start + limit]
+        entries = []
+        for name in selected:
+            _, size, mtime = all_entries[name]
+            entries.append(dict(name=name, size=size, mtime=mtime))
+        more = start + limit < len(names)
+        return entries, (selected[-1] if more and selected else None), len(names)
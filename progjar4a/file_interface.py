@@ -1,62 +1,620 @@
 import os
+import time
+import logging
 import json
 import base64
-from glob import glob
+import tempfile
+import uuid
+import hashlib
+
+from file_store import BlobStore, hash_file
+from file_index import DirectoryIndex
+from file_singleflight import SingleFlight
+from file_locks import FileLockManager
+from file_compress import StreamDecompressor
+from file_delta import block_signatures, apply_delta
+from file_transfer import Base64StreamDecoder, BufferStream, TarStream, MMAP_THRESHOLD, MAX_FRAME_SIZE, map_file, feed
+
+# fsync policies for uploads:
+# - none : leave flushing to the OS page cache
+# - file : fsync the temp file before it is renamed into place
+# - full : also fsync the directory so the rename itself is durable
+FSYNC_POLICIES = ('none', 'file', 'full')
+
+# Largest file an UPLOAD_INIT session may preallocate: a RAW GET sends
+# the whole file as one frame with a 4-byte length
+MAX_UPLOAD_SIZE = MAX_FRAME_SIZE  # just under 4GB
+# Chunked upload sessions without activity for this long are removed
+UPLOAD_SESSION_TTL = 24 * 60 * 60  # 1 day
+# Expired sessions are looked for at most this often
+SESSION_SWEEP_INTERVAL = 60
+
+
+def file_version(size, mtime_ns, inode):
+    """Token that changes whenever a name is given new content
+
+    Every upload renames a new inode (a blob link) into place, so a
+    resumed download can tell that its partial file is from another version.
+    """
+    return f"{inode}-{mtime_ns}-{size}"
+
+
+def sync_data(fd, fsync_policy):
+    """fsync a fully written temp file before it is renamed into place
+
+    Runs before any lock is taken: only the rename itself is exclusive.
+    """
+    if fsync_policy in ('file', 'full'):
+        os.fsync(fd)
+
+
+def sync_directory(filename, fsync_policy):
+    """With the full policy, make the rename of filename itself durable"""
+    if fsync_policy == 'full':
+        dir_fd = os.open(os.path.dirname(filename) or '.', os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class AtomicWriter:
+    """Write a file into a hidden temp file and rename it into place on commit
+
+    Readers only ever see the old file or the complete new one, never a
+    half-written upload. With a BlobStore the data is hashed while it is
+    written and committed through the content-addressed store.
+    """
+
+    def __init__(self, filename, fsync_policy='file', store=None):
+        self.filename = filename
+        self.fsync_policy = fsync_policy
+        self.store = store
+        self.hasher = hashlib.sha256() if store is not None else None
+        self.digest = None
+        self.deduplicated = False
+        self.synced = False
+        directory = os.path.dirname(filename) or '.'
+        fd, self.temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(filename)}.", suffix='.tmp', dir=directory)
+        self.fp = os.fdopen(fd, 'wb')
+
+    def write(self, data):
+        if self.hasher is not None:
+            self.hasher.update(data)
+        return self.fp.write(data)
+
+    def prepare(self, expected_digest=None):
+        """Flush, verify and fsync the data, before commit() takes any lock"""
+        self.fp.flush()
+        if self.hasher is not None:
+            self.digest = self.hasher.hexdigest()
+            if expected_digest is not None and expected_digest != self.digest:
+                raise ValueError(f'Checksum mismatch: expected {expected_digest}, got {self.digest}')
+        # Content that is already stored is durable; this copy is discarded
+        if self.store is None or not self.store.have(self.digest):
+            sync_data(self.fp.fileno(), self.fsync_policy)
+            self.synced = True
+
+    def commit(self):
+        """Swap the prepared file in: only links and renames, run under the name's lock"""
+        if self.store is None:
+            os.replace(self.temp_path, self.filename)
+        else:
+            self.deduplicated = self.store.commit(self.temp_path, self.filename, self.digest, self.replace)
+        self.fp.close()
+
+    def replace(self, temp_path, filename, deduplicated):
+        if not deduplicated and not self.synced:
+            # The blob prepare() found was removed before the commit
+            sync_data(self.fp.fileno(), self.fsync_policy)
+        os.replace(temp_path, filename)
+
+    def abort(self):
+        self.fp.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
 
 
 class FileInterface:
-    def __init__(self):
+    def __init__(self, fsync_policy='file', cache=None):
+        self.fsync_policy = fsync_policy
+        # Optional FileCache for hot files; None reads every GET from disk
+        self.cache = cache
+        # RAW GETs only come from the cache when the server cannot sendfile
+        # them: a zero-copy send from the page cache beats a Python buffer
+        self.cache_raw = False
         # Create files directory if it doesn't exist
         if not os.path.exists('files'):
             os.makedirs('files')
         os.chdir('files/')
+        # Content-addressed storage: every stored name is a hard link to a blob
+        self.store = BlobStore()
+        # In-memory listing of the storage directory for LIST
+        self.index = DirectoryIndex()
+        # Concurrent identical reads share one disk read and encode
+        self.flights = SingleFlight()
+        # Per-name reader/writer locks: writers swap files in, readers open them
+        self.locks = FileLockManager()
+        self.max_upload_size = MAX_UPLOAD_SIZE
+        self.session_ttl = UPLOAD_SESSION_TTL
+        self.last_session_sweep = 0.0
+
+    def open_locked(self,filename):
+        # The open file keeps reading the version it opened, even after a swap
+        with self.locks.reading(filename):
+            return open(f"{filename}",'rb')
 
     def list(self,params=[]):
         try:
-            filelist = glob('*.*')
-            return dict(status='OK',data=filelist)
+            if not params:
+                # Legacy LIST: every file name, no metadata
+                return dict(status='OK',data=self.index.all_names())
+            # params = [pattern, limit, after]: one page of name/size/mtime entries
+            pattern, limit, after = params
+            entries, last, total = self.index.page(pattern, limit, after)
+            return dict(status='OK',data=entries,data_total=total,
+                        data_next_cursor=last.encode().hex() if last is not None else None)
         except Exception as e:
             return dict(status='ERROR',data=str(e))
 
+    def check_range(self,size,params):
+        # Optional byte range: params = [filename, offset, length]
+        offset = params[1] if len(params) > 1 and params[1] is not None else 0
+        if offset < 0 or offset > size:
+            raise ValueError(f'Invalid range: offset {offset} for file of {size} bytes')
+        length = params[2] if len(params) > 2 and params[2] is not None else size - offset
+        length = min(max(length, 0), size - offset)
+        return offset, length
+
+    def check_frame(self,length):
+        # Checked before the header is sent: a RAW body is a single frame
+        if length > MAX_FRAME_SIZE:
+            raise ValueError(f'Range too large: a RAW GET sends at most {MAX_FRAME_SIZE} bytes, '
+                             f'use OFFSET and LENGTH')
+
+    def read_range(self,fp,params):
+        size = os.fstat(fp.fileno()).st_size
+        offset, length = self.check_range(size, params)
+        fp.seek(offset)
+        return offset, length, size
+
+    def load_cached(self,filename):
+        """Return the cache entry for filename, reading the file in on a miss
+
+        Returns None when the file is too large to be cached.
+        """
+        st = os.stat(filename)
+        entry = self.cache.get(filename, st)
+        if entry is not None:
+            return entry
+        return self.flights.do(('load', filename, st.st_ino, st.st_size, st.st_mtime_ns),
+                               lambda: self.read_into_cache(filename))
+
+    def read_into_cache(self,filename):
+        with self.open_locked(filename) as fp:
+            # fstat the open file so the entry matches exactly the bytes read
+            st = os.fstat(fp.fileno())
+            if not self.cache.accepts(st.st_size):
+                return None
+            content = fp.read()
+        return self.cache.put(filename, st, content)
+
+    def get_cached(self,filename,params):
+        entry = self.load_cached(filename)
+        if entry is None:
+            return None
+        size = len(entry.content)
+        offset, length = self.check_range(size, params)
+        if length == size:
+            # Whole-file GETs of a hot file reuse the encoded response body
+            file_content_b64 = entry.encoded.get('base64')
+            if file_content_b64 is None:
+                file_content_b64 = base64.b64encode(entry.content).decode()
+                if self.cache.keep_encoded:
+                    self.cache.add_encoded(filename, entry, 'base64', file_content_b64)
+        else:
+            file_content_b64 = base64.b64encode(memoryview(entry.content)[offset:offset + length]).decode()
+        return dict(status='OK',data_namafile=filename,data_file=file_content_b64,
+                    data_offset=offset,data_total=size)
+
     def get(self,params=[]):
         try:
             filename = params[0]
             if (filename == ''):
                 return None
-            fp = open(f"{filename}",'rb')
-            file_content = fp.read()
-            # Convert binary to base64 string for JSON serialization
-            file_content_b64 = base64.b64encode(file_content).decode()
-            return dict(status='OK',data_namafile=filename,data_file=file_content_b64)
+            # Identical GETs of the same version of the file share one read
+            # and encode; each caller gets its own copy of the response dict
+            st = os.stat(filename)
+            key = ('get', filename, st.st_ino, st.st_size, st.st_mtime_ns) + tuple(params[1:3])
+            return dict(self.flights.do(key, lambda: self.read_encoded(filename, params)))
+        except Exception as e:
+            return dict(status='ERROR',data=str(e))
+
+    def read_encoded(self,filename,params):
+        if self.cache is not None:
+            hasil = self.get_cached(filename, params)
+            if hasil is not None:
+                return hasil
+        with self.open_locked(filename) as fp:
+            offset, length, size = self.read_range(fp, params)
+            if length >= MMAP_THRESHOLD:
+                # Encode straight from the page cache, without a bytes copy
+                stream = map_file(fp, offset, length)
+                try:
+                    file_content_b64 = base64.b64encode(stream.read()).decode()
+                finally:
+                    stream.close()
+            else:
+                # Convert binary to base64 string for JSON serialization
+                file_content_b64 = base64.b64encode(fp.read(length)).decode()
+        return dict(status='OK',data_namafile=filename,data_file=file_content_b64,
+                    data_offset=offset,data_total=size)
+
+    def get_raw(self,params=[]):
+        try:
+            filename = params[0]
+            if (filename == ''):
+                return None
+            entry = self.load_cached(filename) if self.cache is not None and self.cache_raw else None
+            if entry is not None:
+                size = len(entry.content)
+                offset, length = self.check_range(size, params)
+                self.check_frame(length)
+                return dict(status='OK',data_namafile=filename,data_size=length,
+                            data_stream=BufferStream(entry.content, offset, length),
+                            data_offset=offset,data_total=size,
+                            data_version=file_version(entry.size, entry.mtime_ns, entry.inode))
+            # The open file is streamed to the client by the connection handler,
+            # starting at the requested offset
+            fp = self.open_locked(filename)
+            try:
+                offset, length, size = self.read_range(fp, params)
+                self.check_frame(length)
+            except BaseException:
+                fp.close()
+                raise
+            st = os.fstat(fp.fileno())
+            return dict(status='OK',data_namafile=filename,data_size=length,data_stream=fp,
+                        data_offset=offset,data_total=size,
+                        data_version=file_version(st.st_size, st.st_mtime_ns, st.st_ino))
+        except Exception as e:
+            return dict(status='ERROR',data=str(e))
+
+    def mget(self,params=[]):
+        try:
+            # params: file names and/or glob patterns
+            if not params:
+                return dict(status='ERROR',data='Invalid parameters')
+            files, missing = self.index.find(params)
+            return dict(status='OK',data_format='tar',data_files=len(files),
+                        data_bytes=sum(size for _, size in files),data_missing=missing,
+                        data_stream=TarStream([name for name, _ in files], self.open_locked))
+        except Exception as e:
+            return dict(status='ERROR',data=str(e))
+
+    def stat(self,params=[]):
+        try:
+            filename = params[0]
+            if (filename == ''):
+                return dict(status='ERROR',data='Invalid filename')
+            with self.locks.reading(filename):
+                st = os.stat(filename)
+                digest = self.store.lookup(filename)
+            return dict(status='OK',data_namafile=filename,data_size=st.st_size,data_mtime=st.st_mtime,
+                        data_sha256=digest,data_version=file_version(st.st_size, st.st_mtime_ns, st.st_ino))
         except Exception as e:
             return dict(status='ERROR',data=str(e))
 
     def upload(self,params=[]):
+        filename = params[0]
+        content = params[1]
+        if (filename == '' or content is None):
+            return dict(status='ERROR',data='Invalid parameters')
+        try:
+            return feed(self.upload_sink([filename] + list(params[2:])), content)
+        except Exception as e:
+            return dict(status='ERROR',data=str(e))
+
+    def upload_sink(self,params=[]):
+        """Payload sink for upload: params as for upload, without the content
+
+        The chunks sent in are written to disk one by one (see
+        file_transfer.start_sink), so the caller decides where the wait
+        for the network happens.
+        """
         try:
             filename = params[0]
-            file_content_b64 = params[1]
-            if (filename == '' or file_content_b64 == ''):
+            # RAW uploads carry the file bytes as-is, legacy uploads carry base64
+            raw = len(params) > 1 and params[1] == 'RAW'
+            # Optional sha256 the client expects the stored content to have
+            expected_digest = params[2] if len(params) > 2 else None
+            # Optional compression codec of a RAW payload
+            codec = params[3] if len(params) > 3 else None
+            if (filename == ''):
                 return dict(status='ERROR',data='Invalid parameters')
-            
-            # Decode base64 content and write to file
-            file_content = base64.b64decode(file_content_b64)
-            with open(filename, 'wb') as fp:
-                fp.write(file_content)
-            return dict(status='OK',data=f'File {filename} uploaded successfully')
+
+            # Write content into a temp file, then rename it into place
+            if codec is not None:
+                decoder = StreamDecompressor(codec)
+            else:
+                decoder = None if raw else Base64StreamDecoder()
+            writer = AtomicWriter(filename, self.fsync_policy, self.store)
+            try:
+                while (chunk := (yield)) is not None:
+                    writer.write(chunk if decoder is None else decoder.decode(chunk))
+                if decoder is not None:
+                    writer.write(decoder.flush())
+                writer.prepare(expected_digest)
+                # Only the swap is exclusive; the data was written and synced without the lock
+                with self.locks.writing(filename):
+                    writer.commit()
+                    self.invalidate(filename)
+                sync_directory(filename, self.fsync_policy)
+            except BaseException:
+                writer.abort()
+                raise
+            hasil = dict(status='OK',data=f'File {filename} uploaded successfully',
+                         data_sha256=writer.digest,data_deduplicated=writer.deduplicated)
+            if codec is not None:
+                hasil['data_compression'] = decoder.report.as_dict()
+            return hasil
         except Exception as e:
             return dict(status='ERROR',data=str(e))
 
+    def signatures(self,params=[]):
+        try:
+            filename = params[0]
+            block_size = params[1]
+            if (filename == ''):
+                return dict(status='ERROR',data='Invalid filename')
+            with self.open_locked(filename) as fp:
+                size = os.fstat(fp.fileno()).st_size
+                blocks = block_signatures(fp, block_size)
+            return dict(status='OK',data_namafile=filename,data_size=size,data_block_size=block_size,
+                        data_blocks=blocks)
+        except Exception as e:
+            return dict(status='ERROR',data=str(e))
+
+    def delta(self,params=[]):
+        filename = params[0]
+        content = params[1]
+        if (filename == '' or content is None):
+            return dict(status='ERROR',data='Invalid parameters')
+        try:
+            return feed(self.delta_sink([filename] + list(params[2:])), content)
+        except Exception as e:
+            return dict(status='ERROR',data=str(e))
+
+    def delta_sink(self,params=[]):
+        """Payload sink for delta: params as for delta, without the content"""
+        try:
+            filename = params[0]
+            block_size = params[1]
+            expected_digest = params[2] if len(params) > 2 else None
+            if (filename == ''):
+                return dict(status='ERROR',data='Invalid parameters')
+
+            # The open descriptor keeps the old version readable even if the
+            # name is replaced while the new one is being rebuilt
+            with self.locks.reading(filename):
+                basis_fd = os.open(filename, os.O_RDONLY)
+            try:
+                writer = AtomicWriter(filename, self.fsync_policy, self.store)
+                try:
+                    copied, literal = yield from apply_delta(basis_fd, writer, block_size)
+                    writer.prepare(expected_digest)
+                    with self.locks.writing(filename):
+                        writer.commit()
+                        self.invalidate(filename)
+                    sync_directory(filename, self.fsync_policy)
+                except BaseException:
+                    writer.abort()
+                    raise
+            finally:
+                os.close(basis_fd)
+            return dict(status='OK',data=f'File {filename} updated successfully',
+                        data_sha256=writer.digest,data_copied=copied,data_literal=literal)
+        except Exception as e:
+            return dict(status='ERROR',data=str(e))
+
+    def have(self,params=[]):
+        try:
+            digest = params[0]
+            return dict(status='OK',data_sha256=digest,data_have=self.store.have(digest))
+        except Exception as e:
+            return dict(status='ERROR',data=str(e))
+
+    def link(self,params=[]):
+        try:
+            filename = params[0]
+            digest = params[1]
+            if (filename == ''):
+                return dict(status='ERROR',data='Invalid filename')
+            # Metadata-only upload: the content is already stored
+            with self.locks.writing(filename):
+                if not self.store.link(digest, filename):
+                    return dict(status='ERROR',data=f'Unknown blob {digest}')
+                self.invalidate(filename)
+            return dict(status='OK',data=f'File {filename} uploaded successfully',
+                        data_sha256=digest,data_deduplicated=True)
+        except Exception as e:
+            return dict(status='ERROR',data=str(e))
+
+    # Chunked upload sessions live on disk (hidden files in the storage
+    # directory) so that parts can arrive on any connection, in any
+    # process of a multi-process server:
+    # - .upload-<id>.json : target filename, size and part size
+    # - .upload-<id>.part : preallocated data file, parts written with pwrite
+    # - .upload-<id>.log  : index of every completed part, one per line
+    def session_path(self,upload_id,suffix):
+        if not upload_id.isalnum():
+            raise ValueError('Invalid upload id')
+        return f".upload-{upload_id}.{suffix}"
+
+    def load_session(self,upload_id):
+        meta_path = self.session_path(upload_id, 'json')
+        if not os.path.exists(meta_path):
+            raise ValueError(f'Unknown upload id {upload_id}')
+        with open(meta_path) as fp:
+            return json.load(fp)
+
+    def sweep_sessions(self):
+        """Remove chunked upload sessions abandoned for session_ttl seconds
+
+        A session's last activity is the newest mtime of its files; the
+        part log is appended to for every part received.
+        """
+        now = time.time()
+        if now - self.last_session_sweep < SESSION_SWEEP_INTERVAL:
+            return
+        self.last_session_sweep = now
+        last_active = {}
+        with os.scandir('.') as it:
+            for entry in it:
+                if not entry.name.startswith('.upload-'):
+                    continue
+                upload_id = entry.name[len('.upload-'):].split('.', 1)[0]
+                try:
+                    mtime = entry.stat(follow_symlinks=False).st_mtime
+                except FileNotFoundError:
+                    continue
+                last_active[upload_id] = max(last_active.get(upload_id, 0), mtime)
+        for upload_id, mtime in last_active.items():
+            if upload_id.isalnum() and now - mtime > self.session_ttl:
+                logging.warning(f"Removing abandoned upload session {upload_id}")
+                self.upload_abort([upload_id])
+
+    def upload_init(self,params=[]):
+        try:
+            filename = params[0]
+            size = params[1]
+            part_size = params[2]
+            if (filename == '' or size < 0 or part_size <= 0):
+                return dict(status='ERROR',data='Invalid parameters')
+            if size > self.max_upload_size:
+                return dict(status='ERROR',data=f'File too large: at most {self.max_upload_size} bytes')
+            self.sweep_sessions()
+            upload_id = uuid.uuid4().hex
+            fd = os.open(self.session_path(upload_id, 'part'), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            try:
+                # Preallocate so parts are written in place and assembly needs no copy
+                if hasattr(os, 'posix_fallocate') and size > 0:
+                    os.posix_fallocate(fd, 0, size)
+                else:
+                    os.ftruncate(fd, size)
+            finally:
+                os.close(fd)
+            parts = -(-size // part_size)
+            with open(self.session_path(upload_id, 'json'), 'w') as fp:
+                json.dump(dict(filename=filename, size=size, part_size=part_size, parts=parts), fp)
+            open(self.session_path(upload_id, 'log'), 'w').close()
+            return dict(status='OK',upload_id=upload_id,part_size=part_size,parts=parts)
+        except Exception as e:
+            return dict(status='ERROR',data=str(e))
+
+    def upload_part(self,params=[]):
+        content = params[2]
+        length = len(content) if isinstance(content, bytes) else content.length
+        try:
+            return feed(self.upload_part_sink([params[0], params[1], length]), content)
+        except Exception as e:
+            return dict(status='ERROR',data=str(e))
+
+    def upload_part_sink(self,params=[]):
+        """Payload sink for upload_part: upload_id, index and the payload length"""
+        try:
+            upload_id = params[0]
+            index = params[1]
+            length = params[2]
+            session = self.load_session(upload_id)
+            if not 0 <= index < session['parts']:
+                return dict(status='ERROR',data=f'Invalid part index {index}')
+            offset = index * session['part_size']
+            expected = min(session['part_size'], session['size'] - offset)
+            if length != expected:
+                return dict(status='ERROR',data=f'Part {index} must be {expected} bytes, got {length}')
+
+            fd = os.open(self.session_path(upload_id, 'part'), os.O_WRONLY)
+            try:
+                position = offset
+                while (chunk := (yield)) is not None:
+                    position += os.pwrite(fd, chunk, position)
+            finally:
+                os.close(fd)
+            # O_APPEND keeps concurrent log writes from different connections intact
+            log_fd = os.open(self.session_path(upload_id, 'log'), os.O_WRONLY | os.O_APPEND)
+            try:
+                os.write(log_fd, f"{index}\n".encode())
+            finally:
+                os.close(log_fd)
+            return dict(status='OK',data=f'Part {index} of {upload_id} stored')
+        except Exception as e:
+            return dict(status='ERROR',data=str(e))
+
+    def upload_complete(self,params=[]):
+        try:
+            upload_id = params[0]
+            session = self.load_session(upload_id)
+            with open(self.session_path(upload_id, 'log')) as fp:
+                received = {int(line) for line in fp if line.strip()}
+            missing = sorted(set(range(session['parts'])) - received)
+            if missing:
+                return dict(status='ERROR',data='Missing parts',missing=missing)
+
+            part_path = self.session_path(upload_id, 'part')
+            digest = hash_file(part_path)
+            fd = os.open(part_path, os.O_RDONLY)
+            try:
+                # The assembled file may be huge: fsync it before taking any lock
+                synced = not self.store.have(digest)
+                if synced:
+                    sync_data(fd, self.fsync_policy)
+
+                def replace(temp_path, filename, deduplicated):
+                    if not deduplicated and not synced:
+                        sync_data(fd, self.fsync_policy)
+                    os.replace(temp_path, filename)
+                with self.locks.writing(session['filename']):
+                    deduplicated = self.store.commit(part_path, session['filename'], digest, replace)
+                    self.invalidate(session['filename'])
+            finally:
+                os.close(fd)
+            sync_directory(session['filename'], self.fsync_policy)
+            self.upload_abort([upload_id])
+            return dict(status='OK',data=f"File {session['filename']} uploaded successfully",
+                        data_sha256=digest,data_deduplicated=deduplicated)
+        except Exception as e:
+            return dict(status='ERROR',data=str(e))
+
+    def upload_abort(self,params=[]):
+        try:
+            upload_id = params[0]
+            for suffix in ('part', 'json', 'log'):
+                path = self.session_path(upload_id, suffix)
+                if os.path.exists(path):
+                    os.remove(path)
+            return dict(status='OK',data=f'Upload {upload_id} removed')
+        except Exception as e:
+            return dict(status='ERROR',data=str(e))
+
+    def invalidate(self,filename):
+        self.index.invalidate()
+        if self.cache is not None:
+            self.cache.invalidate(filename)
+
     def delete(self,params=[]):
         try:
             filename = params[0]
             if (filename == ''):
                 return dict(status='ERROR',data='Invalid filename')
             
-            if os.path.exists(filename):
-                os.remove(filename)
-                return dict(status='OK',data=f'File {filename} deleted successfully')
-            else:
-                return dict(status='ERROR',data='File not found')
+            with self.locks.writing(filename):
+                if os.path.exists(filename):
+                    self.store.remove(filename)
+                    self.invalidate(filename)
+                    return dict(status='OK',data=f'File {filename} deleted successfully')
+                else:
+                    return dict(status='ERROR',data='File not found')
         except Exception as e:
             return dict(status='ERROR',data=str(e))
 
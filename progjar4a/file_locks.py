@@ -0,0 +1,124 @@
+import threading
+from contextlib import contextmanager
+
+"""
+* class FileLockManager memberi lock reader/writer per nama file:
+banyak reader boleh memegang lock nama yang sama bersamaan, writer
+memegangnya sendirian
+
+* lock hanya ada selama dipakai (dihitung dengan refcount) sehingga
+jumlahnya tidak bertambah terus, dan file yang berbeda tidak pernah
+saling menunggu
+
+* writer tidak menulis data di dalam lock: data ditulis ke file
+sementara terlebih dahulu, lock writer hanya dipegang saat file
+sementara di-rename menggantikan file lama (atau saat file dihapus).
+Reader hanya memegang lock saat membuka file; setelah terbuka, file
+descriptor tetap menunjuk ke versi yang dibuka walaupun namanya sudah
+diganti
+
+* writer yang menunggu didahulukan dari reader baru, sehingga upload
+tidak tertahan selamanya oleh GET yang terus berdatangan
+
+* lock ini hanya berlaku di dalam satu proses
+"""
+
+
+class FileLock:
+    def __init__(self):
+        self.cond = threading.Condition(threading.Lock())
+        self.readers = 0
+        self.writer = False
+        self.writers_waiting = 0
+        # Threads currently holding or waiting for this lock
+        self.refs = 0
+
+    def acquire_read(self):
+        with self.cond:
+            waited = self.writer or self.writers_waiting > 0
+            self.cond.wait_for(lambda: not self.writer and self.writers_waiting == 0)
+            self.readers += 1
+            return waited
+
+    def release_read(self):
+        with self.cond:
+            self.readers -= 1
+            if self.readers == 0:
+                self.cond.notify_all()
+
+    def acquire_write(self):
+        with self.cond:
+            waited = self.writer or self.readers > 0
+            self.writers_waiting += 1
+            self.cond.wait_for(lambda: not self.writer and self.readers == 0)
+            self.writers_waiting -= 1
+            self.writer = True
+            return waited
+
+    def release_write(self):
+        with self.cond:
+            self.writer = False
+            self.cond.notify_all()
+
+
+class FileLockManager:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.locks = {}
+        self.reads = 0
+        self.writes = 0
+        self.waits = 0
+
+    def checkout(self, name):
+        with self.lock:
+            lock = self.locks.get(name)
+            if lock is None:
+                lock = self.locks[name] = FileLock()
+            lock.refs += 1
+            return lock
+
+    def checkin(self, name, lock):
+        with self.lock:
+            lock.refs -= 1
+            if lock.refs == 0:
+                del self.locks[name]
+
+    def count(self, field, waited):
+        with self.lock:
+            setattr(self, field, getattr(self, field) + 1)
+            if waited:
+                self.waits += 1
+
+    @contextmanager
+    def reading(self, name):
+        """Shared lock on name: other readers are let in, writers wait"""
+        lock = self.checkout(name)
+        try:
+            self.count('reads', lock.acquire_read())
+        except BaseException:
+            self.checkin(name, lock)
+            raise
+        try:
+            yield
+        finally:
+            lock.release_read()
+            self.checkin(name, lock)
+
+    @contextmanager
+    def writing(self, name):
+        """Exclusive lock on name"""
+        lock = self.checkout(name)
+        try:
+            self.count('writes', lock.acquire_write())
+        except BaseException:
+            self.checkin(name, lock)
+            raise
+        try:
+            yield
+        finally:
+            lock.release_write()
+            self.checkin(name, lock)
+
+    def stats(self):
+        with self.lock:
+            return dict(active=len(self.locks), reads=self.reads, writes=self.writes, waits=self.waits)
@@ -0,0 +1,114 @@
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+"""
+* class AdaptivePool adalah thread pool yang ukurannya menyesuaikan
+beban, antara min_workers dan max_workers
+
+* pool membesar saat ada pekerjaan yang mengantre dan tidak ada worker
+yang menganggur: satu thread baru per pekerjaan yang menunggu, sampai
+max_workers
+
+* pool mengecil saat worker menganggur: worker yang tidak mendapat
+pekerjaan selama cooldown detik berhenti, selama jumlah worker masih di
+atas min_workers; worker juga tidak berhenti jika pool baru saja
+membesar dalam cooldown terakhir, sehingga ukuran pool tidak naik turun
+terus pada beban yang naik turun
+
+* ukuran pool, jumlah worker yang sibuk dan panjang antrean bisa dilihat
+lewat stats()
+"""
+
+
+class AdaptivePool:
+    def __init__(self, min_workers=1, max_workers=50, cooldown=10.0, name='pool'):
+        if min_workers < 0 or max_workers < max(min_workers, 1):
+            raise ValueError(f'Invalid pool size {min_workers}..{max_workers}')
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.cooldown = cooldown
+        self.name = name
+        self.cond = threading.Condition()
+        self.tasks = deque()
+        self.threads = set()
+        self.busy = 0
+        self.peak = 0
+        self.started = 0
+        self.retired = 0
+        self.completed = 0
+        self.last_grow = 0.0
+        self.running = True
+        with self.cond:
+            for _ in range(min_workers):
+                self.spawn()
+
+    def spawn(self):
+        # Caller holds the lock
+        thread = threading.Thread(target=self.work, name=f"{self.name}-{self.started}", daemon=True)
+        self.threads.add(thread)
+        self.started += 1
+        self.peak = max(self.peak, len(self.threads))
+        thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        with self.cond:
+            if not self.running:
+                raise RuntimeError('cannot schedule new futures after shutdown')
+            self.tasks.append((future, fn, args, kwargs))
+            idle = len(self.threads) - self.busy
+            if len(self.tasks) > idle and len(self.threads) < self.max_workers:
+                self.last_grow = time.monotonic()
+                self.spawn()
+            self.cond.notify()
+        return future
+
+    def work(self):
+        me = threading.current_thread()
+        while True:
+            with self.cond:
+                idle_since = time.monotonic()
+                while not self.tasks:
+                    if not self.running or self.should_retire(idle_since):
+                        self.threads.discard(me)
+                        if self.running:
+                            self.retired += 1
+                        return
+                    self.cond.wait(self.cooldown)
+                future, fn, args, kwargs = self.tasks.popleft()
+                self.busy += 1
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    logging.error(f"{self.name} task failed: {str(e)}")
+                    future.set_exception(e)
+            with self.cond:
+                self.busy -= 1
+                self.completed += 1
+
+    def should_retire(self, idle_since):
+        # Caller holds the lock
+        if len(self.threads) <= self.min_workers:
+            return False
+        now = time.monotonic()
+        return now - idle_since >= self.cooldown and now - self.last_grow >= self.cooldown
+
+    def stats(self):
+        with self.cond:
+            return dict(workers=len(self.threads), busy=self.busy, queued=len(self.tasks),
+                        min=self.min_workers, max=self.max_workers, peak=self.peak,
+                        started=self.started, retired=self.retired, completed=self.completed)
+
+    def shutdown(self, wait=True):
+        with self.cond:
+            self.running = False
+            threads = list(self.threads)
+            self.cond.notify_all()
+        if wait:
+            for thread in threads:
+                if thread is not threading.current_thread():
+                    thread.join()
@@ -4,6 +4,21 @@ import shlex
 import os
 
 from file_interface import FileInterface
+from file_stats import ServerStats
+from file_compress import COMPRESSION_CODECS, COMPRESS_CHUNK_SIZE, CODEC_MEMORY, SAMPLE_SIZE, CompressedStream, should_compress
+from file_delta import DEFAULT_BLOCK_SIZE, MIN_BLOCK_SIZE, MAX_BLOCK_SIZE, MAX_LITERAL
+from file_transfer import STREAM_CHUNK_SIZE, feed
+from generate_test_files import generate_test_file
+
+# Part size for chunked upload sessions when the client does not choose one
+DEFAULT_PART_SIZE = 8 * 1024 * 1024  # 8MB
+# Page size of LIST with a pattern
+DEFAULT_LIST_LIMIT = 1000
+MAX_LIST_LIMIT = 10000
+# Commands whose transfer buffers are charged to the memory budget
+BUFFERED_COMMANDS = ('get', 'mget', 'upload', 'upload_part', 'upload_complete', 'delta', 'signatures')
+# A base64 GET holds the file bytes, the base64 text and the JSON response at once
+BASE64_MEMORY_FACTOR = 4
 
 """
 * class FileProtocol bertugas untuk memproses 
@@ -22,14 +37,169 @@ string
 class FileProtocol:
     def __init__(self):
         self.file = FileInterface()
+        # Replaced by the server with a shared table when running multiple processes
+        self.stats = ServerStats()
+        # Extra STATS sections supplied by the server: name -> callable returning a dict
+        self.reporters = {}
+        # Optional MemoryBudget for in-flight transfer buffers; None admits everything
+        self.budget = None
         # Generate test files if they don't exist
         self.generate_test_files()
 
-    
+    def generate_test_files(self):
+        # Test files used by the stress tests
+        test_files = [
+            ('test_10mb.bin', 10),
+            ('test_50mb.bin', 50),
+            ('test_100mb.bin', 100)
+        ]
+        for filename, size_mb in test_files:
+            if not os.path.exists(filename):
+                generate_test_file(size_mb, filename)
+
+    def generate_test_file(self, size_mb, filename):
+        if size_mb <= 0:
+            return dict(status='ERROR', data='Invalid file size specified')
+        if os.path.exists(filename):
+            # Never rewrite in place: the name may be a link to a shared blob
+            self.file.delete([filename])
+        generate_test_file(size_mb, filename)
+        if not os.path.exists(filename):
+            return dict(status='ERROR', data=f'Failed to generate {filename}')
+        return dict(status='OK', data=f'File {filename} generated ({size_mb}MB)')
+
+    def parse_keyword(self, params, keyword):
+        # Value following an optional KEYWORD parameter, or None
+        if keyword not in params:
+            return None
+        position = params.index(keyword) + 1
+        if position >= len(params):
+            raise ValueError(f'{keyword} requires a value')
+        return params[position]
+
+    def parse_codec(self, params):
+        # Optional compression: ... COMPRESS codec
+        codec = self.parse_keyword(params, 'COMPRESS')
+        if codec is None:
+            return None
+        if codec.lower() not in COMPRESSION_CODECS:
+            raise ValueError(f"COMPRESS takes one of {', '.join(COMPRESSION_CODECS)}")
+        return codec.lower()
+
+    def parse_digest(self, params):
+        # Optional integrity check: ... SHA256 digest
+        digest = self.parse_keyword(params, 'SHA256')
+        return digest.lower() if digest is not None else None
+
+    def parse_block_size(self, params):
+        # Optional BLOCK_SIZE right after the filename of SIGNATURES/DELTA
+        block_size = int(params[0]) if params and params[0].isdigit() else DEFAULT_BLOCK_SIZE
+        if not MIN_BLOCK_SIZE <= block_size <= MAX_BLOCK_SIZE:
+            raise ValueError(f'Block size must be between {MIN_BLOCK_SIZE} and {MAX_BLOCK_SIZE}')
+        return block_size
+
+    def memory_cost(self, command, filename, params):
+        """Rough peak size in bytes of the buffers a request needs while in flight"""
+        command = command.lower().strip()
+        if command not in BUFFERED_COMMANDS:
+            return 0
+        params = [p.upper() for p in params]
+        try:
+            if command == 'signatures':
+                return self.parse_block_size(params)
+            cost = STREAM_CHUNK_SIZE
+            if command == 'get' and 'RAW' not in params:
+                numbers = [int(p) for p in params if p.isdigit()]
+                size = os.stat(filename).st_size
+                offset = min(numbers[0], size) if numbers else 0
+                length = min(numbers[1], size - offset) if len(numbers) > 1 else size - offset
+                cost = length * BASE64_MEMORY_FACTOR
+            elif command == 'delta':
+                cost += MAX_LITERAL
+            codec = self.parse_codec(params)
+            if codec is not None:
+                cost += COMPRESS_CHUNK_SIZE + CODEC_MEMORY[codec]
+            return cost
+        except (OSError, ValueError):
+            # The command itself will report the error
+            return STREAM_CHUNK_SIZE
+
+    def admit(self, command, filename, params):
+        """Reserve the request's memory; the token is passed to release()"""
+        if self.budget is None:
+            return None
+        cost = self.memory_cost(command, filename, params)
+        return self.budget.acquire(cost) if cost else None
+
+    def release(self, token):
+        if token is not None:
+            self.budget.release(token)
+
+    def compress_response(self, hasil, filename, codec):
+        """Compress a RAW GET stream unless its first block is incompressible"""
+        if hasil.get('status') != 'OK':
+            return hasil
+        stream = hasil['data_stream']
+        position = stream.tell()
+        sample = stream.read(min(SAMPLE_SIZE, hasil['data_size']))
+        stream.seek(position)
+        if not should_compress(sample, codec):
+            self.stats.add('compression_skipped')
+            hasil['data_encoding'] = 'identity'
+            return hasil
+        hasil['data_encoding'] = codec
+        hasil['data_stream'] = CompressedStream(
+            stream, hasil['data_size'], codec,
+            on_done=lambda report: self.record_compression('GET', filename, report.as_dict()))
+        return hasil
 
-    def proses_string(self, command='', filename='', content=None):
+    def record_compression(self, direction, filename, report):
+        logging.warning(f"{direction} {filename}: {report['codec']} {report['bytes']} -> {report['wire_bytes']} bytes "
+                        f"(ratio {report['ratio']:.3f}, cpu {report['cpu_ms']:.1f} ms)")
+        self.stats.add('compressed_transfers')
+        self.stats.add('compression_bytes', report['bytes'])
+        self.stats.add('compression_wire_bytes', report['wire_bytes'])
+        self.stats.add('compression_cpu_us', int(report['cpu_ms'] * 1000))
+
+    def payload_sink(self, command, filename, params, length):
+        """Payload sink (see file_transfer.start_sink) for UPLOAD, DELTA and UPLOAD_PART
+
+        length is the payload size announced by the client, None when it
+        is sent chunked.
+        """
+        params = [p.upper() for p in params or []]
+        try:
+            command = command.lower().strip()
+            if command == 'upload':
+                if not filename:
+                    return dict(status='ERROR', data='Filename required for UPLOAD command')
+                # UPLOAD filename [RAW] [COMPRESS codec] [SHA256 digest]
+                digest = self.parse_digest(params)
+                codec = self.parse_codec(params)
+                if codec is not None and 'RAW' not in params:
+                    return dict(status='ERROR', data='COMPRESS requires RAW mode')
+                hasil = yield from self.file.upload_sink([filename, 'RAW' if 'RAW' in params else None, digest, codec])
+                if 'data_compression' in hasil:
+                    self.record_compression('UPLOAD', filename, hasil['data_compression'])
+                return hasil
+            elif command == 'delta':
+                if not filename:
+                    return dict(status='ERROR', data='Usage: DELTA filename BLOCK_SIZE [SHA256 digest]')
+                return (yield from self.file.delta_sink([filename, self.parse_block_size(params), self.parse_digest(params)]))
+            elif command == 'upload_part':
+                if not filename or not params or not params[0].isdigit():
+                    return dict(status='ERROR', data='Usage: UPLOAD_PART upload_id INDEX')
+                return (yield from self.file.upload_part_sink([filename, int(params[0]), length]))
+            return dict(status='ERROR', data='Unknown command')
+        except Exception as e:
+            return dict(status='ERROR', data=str(e))
+
+    def proses_string(self, command='', filename='', content=None, params=None):
         logging.warning(f"command: {command}")
         logging.warning(f"filename: {filename}")
+        # Keywords are matched upper-cased; MGET file names keep their case
+        raw_params = list(params or [])
+        params = [p.upper() for p in raw_params]
         
         try:
             # Convert command to lowercase and strip whitespace
@@ -37,21 +207,89 @@ class FileProtocol:
             
             # Handle different commands
             if command == 'list':
-                return self.file.list()
+                if not filename and not params:
+                    return self.file.list()
+                # LIST pattern [LIMIT n] [CURSOR c]: one page of entries with size and mtime
+                limit = int(self.parse_keyword(params, 'LIMIT') or DEFAULT_LIST_LIMIT)
+                if not 1 <= limit <= MAX_LIST_LIMIT:
+                    return dict(status='ERROR', data=f'LIMIT must be between 1 and {MAX_LIST_LIMIT}')
+                cursor = self.parse_keyword(params, 'CURSOR')
+                after = bytes.fromhex(cursor).decode() if cursor else None
+                return self.file.list([filename or '*', limit, after])
             elif command == 'get':
                 if not filename:
                     return dict(status='ERROR', data='Filename required for GET command')
-                return self.file.get([filename])
-            elif command == 'upload':
+                # Optional byte range: GET filename [RAW] [OFFSET [LENGTH]]
+                numbers = [int(p) for p in params if p.isdigit()]
+                if len(numbers) > 2:
+                    return dict(status='ERROR', data='GET takes at most OFFSET and LENGTH')
+                byte_range = numbers + [None] * (2 - len(numbers))
+                codec = self.parse_codec(params)
+                # RAW mode streams the file bytes after a small JSON header
+                if 'RAW' in params:
+                    hasil = self.file.get_raw([filename] + byte_range)
+                    if codec is not None:
+                        hasil = self.compress_response(hasil, filename, codec)
+                    return hasil
+                if codec is not None:
+                    return dict(status='ERROR', data='COMPRESS requires RAW mode')
+                return self.file.get([filename] + byte_range)
+            elif command == 'mget':
                 if not filename:
-                    return dict(status='ERROR', data='Filename required for UPLOAD command')
+                    return dict(status='ERROR', data='Usage: MGET pattern-or-filename ...')
+                return self.file.mget([filename] + raw_params)
+            elif command in ('upload', 'delta', 'upload_part'):
                 if content is None:
-                    return dict(status='ERROR', data='Content required for UPLOAD command')
-                return self.file.upload([filename, content])
+                    return dict(status='ERROR', data=f'Content required for {command.upper()} command')
+                length = len(content) if isinstance(content, (bytes, str)) else content.length
+                return feed(self.payload_sink(command, filename, raw_params, length), content)
+            elif command == 'signatures':
+                if not filename:
+                    return dict(status='ERROR', data='Usage: SIGNATURES filename [BLOCK_SIZE]')
+                return self.file.signatures([filename, self.parse_block_size(params)])
+            elif command == 'have':
+                if not filename:
+                    return dict(status='ERROR', data='Usage: HAVE sha256')
+                return self.file.have([filename.lower()])
+            elif command == 'link':
+                if not filename or not params:
+                    return dict(status='ERROR', data='Usage: LINK filename sha256')
+                return self.file.link([filename, params[0].lower()])
+            elif command == 'upload_init':
+                if not filename or not params or not params[0].isdigit():
+                    return dict(status='ERROR', data='Usage: UPLOAD_INIT filename SIZE [PART_SIZE]')
+                size = int(params[0])
+                part_size = int(params[1]) if len(params) > 1 and params[1].isdigit() else DEFAULT_PART_SIZE
+                return self.file.upload_init([filename, size, part_size])
+            elif command == 'upload_complete':
+                if not filename:
+                    return dict(status='ERROR', data='Upload id required for UPLOAD_COMPLETE command')
+                return self.file.upload_complete([filename])
+            elif command == 'upload_abort':
+                if not filename:
+                    return dict(status='ERROR', data='Upload id required for UPLOAD_ABORT command')
+                return self.file.upload_abort([filename])
             elif command == 'delete':
                 if not filename:
                     return dict(status='ERROR', data='Filename required for DELETE command')
                 return self.file.delete([filename])
+            elif command == 'stat':
+                if not filename:
+                    return dict(status='ERROR', data='Filename required for STAT command')
+                return self.file.stat([filename])
+            elif command == 'stats':
+                data = self.stats.snapshot()
+                if self.file.cache is not None:
+                    # The cache is per process: these are the answering worker's counters
+                    data['cache'] = self.file.cache.stats()
+                # Per process as well: reads that joined an identical one in flight
+                data['singleflight'] = self.file.flights.stats()
+                data['locks'] = self.file.locks.stats()
+                if self.budget is not None:
+                    data['memory'] = self.budget.stats()
+                for name, report in self.reporters.items():
+                    data[name] = report()
+                return dict(status='OK', data=data)
             elif command == 'generate_test_file':
                 if not filename:
                     return dict(status='ERROR', data='Filename required for GENERATE_TEST_FILE command')
@@ -0,0 +1,218 @@
+import socket
+import struct
+import logging
+import selectors
+import threading
+import queue
+import time
+
+from file_handler import ProcessTheClient
+
+"""
+* class LaneScheduler membagi request ke beberapa jalur (lane) worker,
+masing-masing dengan thread pool sendiri (AdaptivePool), sehingga command kecil tidak
+mengantre di belakang transfer besar:
+  - control : LIST, STAT, STATS, DELETE, HAVE, LINK, UPLOAD_INIT, UPLOAD_ABORT
+  - bulk    : GET, MGET, UPLOAD, UPLOAD_PART, UPLOAD_COMPLETE, DELTA,
+              SIGNATURES dan command lain
+
+* koneksi yang sedang tidak mengirim request tidak memegang thread:
+koneksi didaftarkan ke selector, dan saat ada request masuk, nama
+command diintip (MSG_PEEK) tanpa diambil dari socket untuk menentukan
+lane-nya; worker lane tersebut lalu membaca dan menjawab satu request,
+setelah itu koneksi dikembalikan ke selector
+
+* request dalam satu koneksi tetap diproses berurutan, karena koneksi
+baru didaftarkan lagi setelah request sebelumnya selesai dijawab
+
+* jika nama command belum lengkap diterima (misalnya length prefix dan
+command dikirim dengan dua write terpisah), koneksi tetap di selector
+dengan SO_RCVLOWAT diset ke jumlah byte yang masih ditunggu, sehingga
+selector baru bangun saat command sudah lengkap; jika sampai
+PEEK_TIMEOUT belum lengkap juga, request dimasukkan ke lane bulk,
+sehingga lane control tidak pernah ikut tertahan
+"""
+
+LANE_COMMANDS = {
+    'control': ('list', 'stat', 'stats', 'delete', 'have', 'link', 'upload_init', 'upload_abort'),
+}
+DEFAULT_LANE = 'bulk'
+
+# Enough to see the length prefix, a "#<id>" tag and the command name
+PEEK_SIZE = 128
+# How long a connection may take to deliver its command name before the
+# request is sent to the default lane anyway
+PEEK_TIMEOUT = 0.5
+
+
+def peek_command(connection):
+    """Lower-case command name of the next request, without consuming it
+
+    Returns (command, wanted): command is '' when the client has closed
+    the connection, and None when the name has not fully arrived yet;
+    wanted is then the number of buffered bytes to wait for (0 when
+    waiting would not help).
+    """
+    try:
+        data = connection.recv(PEEK_SIZE, socket.MSG_PEEK | socket.MSG_DONTWAIT)
+    except BlockingIOError:
+        return None, 4
+    except OSError:
+        return '', 0
+    if not data:
+        return '', 0
+    if len(data) < 4:
+        return None, 4
+    length = struct.unpack('!I', data[:4])[0]
+    text = data[4:4 + length]
+    words = text.split()
+    if words and words[0].startswith(b'#'):
+        words = words[1:]
+    # The last word may be cut off unless the whole command was peeked
+    if not words or (len(words) == 1 and len(text) < length and not text[-1:].isspace()):
+        if len(data) >= PEEK_SIZE:
+            # A name this long is no known command: nothing more to wait for
+            return None, 0
+        return None, min(4 + length, PEEK_SIZE)
+    return words[0].decode(errors='replace').lower(), 0
+
+
+def set_rcvlowat(connection, nbytes):
+    # Readiness (select/poll) is only reported once nbytes are buffered
+    try:
+        connection.setsockopt(socket.SOL_SOCKET, socket.SO_RCVLOWAT, nbytes)
+        return True
+    except (AttributeError, OSError):
+        return False
+
+
+def lane_for(command):
+    for lane, commands in LANE_COMMANDS.items():
+        if command in commands:
+            return lane
+    return DEFAULT_LANE
+
+
+class LaneScheduler:
+    def __init__(self, protocol, pools, use_sendfile=True):
+        # pools: lane name -> thread pool with submit(), stats() and shutdown()
+        self.protocol = protocol
+        self.use_sendfile = use_sendfile
+        self.pools = pools
+        self.selector = selectors.DefaultSelector()
+        # Connections handed back by workers, registered by the selector thread
+        self.resumed = queue.SimpleQueue()
+        self.wakeup_recv, self.wakeup_send = socket.socketpair()
+        self.wakeup_recv.setblocking(False)
+        self.wakeup_send.setblocking(False)
+        self.selector.register(self.wakeup_recv, selectors.EVENT_READ, None)
+        # Connections whose command name is still arriving: handler -> deadline
+        self.partial = {}
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='lane-selector', daemon=True)
+        self.thread.start()
+
+    def add(self, connection, address):
+        handler = ProcessTheClient(connection, address, self.protocol, self.use_sendfile)
+        self.protocol.stats.add('connections')
+        self.protocol.stats.add('active_connections')
+        self.resume(handler)
+
+    def resume(self, handler):
+        self.resumed.put(handler)
+        self.wakeup()
+
+    def wakeup(self):
+        try:
+            self.wakeup_send.send(b'\0')
+        except BlockingIOError:
+            # Wakeup already pending
+            pass
+
+    def run(self):
+        while self.running:
+            timeout = None
+            if self.partial:
+                timeout = max(min(self.partial.values()) - time.monotonic(), 0)
+            for key, _ in self.selector.select(timeout):
+                if key.data is None:
+                    self.register_resumed()
+                    continue
+                self.dispatch(key.data)
+            self.expire_partial()
+
+    def expire_partial(self):
+        now = time.monotonic()
+        for handler, deadline in list(self.partial.items()):
+            if deadline <= now:
+                # Still incomplete: let a bulk worker block on the rest
+                self.submit(handler, DEFAULT_LANE)
+
+    def register_resumed(self):
+        try:
+            while self.wakeup_recv.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+        while not self.resumed.empty():
+            handler = self.resumed.get()
+            try:
+                self.selector.register(handler.connection, selectors.EVENT_READ, handler)
+            except (ValueError, OSError):
+                # Connection already closed
+                self.close(handler)
+
+    def dispatch(self, handler):
+        command, wanted = peek_command(handler.connection)
+        if command is not None:
+            self.submit(handler, lane_for(command))
+            return
+        # Stay in the selector until the command name has arrived
+        if wanted and set_rcvlowat(handler.connection, wanted):
+            self.partial.setdefault(handler, time.monotonic() + PEEK_TIMEOUT)
+            return
+        self.submit(handler, DEFAULT_LANE)
+
+    def submit(self, handler, lane):
+        self.selector.unregister(handler.connection)
+        if self.partial.pop(handler, None) is not None:
+            # Workers read with blocking recv: back to the default watermark
+            set_rcvlowat(handler.connection, 1)
+        if lane not in self.pools:
+            lane = DEFAULT_LANE
+        try:
+            self.pools[lane].submit(self.serve, handler)
+        except RuntimeError:
+            # Pool shut down while stopping
+            self.close(handler)
+
+    def serve(self, handler):
+        keep = False
+        try:
+            keep = handler.serve_one()
+        except Exception as e:
+            logging.error(f"Error serving {handler.address}: {str(e)}")
+        if keep and self.running:
+            self.resume(handler)
+        else:
+            self.close(handler)
+
+    def close(self, handler):
+        self.protocol.stats.add('active_connections', -1)
+        handler.connection.close()
+
+    def stats(self):
+        return {lane: pool.stats() for lane, pool in self.pools.items()}
+
+    def stop(self):
+        self.running = False
+        self.wakeup()
+        self.thread.join()
+        for pool in self.pools.values():
+            pool.shutdown(wait=True)
+        for key in list(self.selector.get_map().values()):
+            if key.data is not None:
+                self.close(key.data)
+        while not self.resumed.empty():
+            self.close(self.resumed.get())
+        self.selector.close()
@@ -10,67 +10,17 @@ import struct
 
 
 from file_protocol import  FileProtocol
+from file_handler import ProcessTheClient as ConnectionHandler
 fp = FileProtocol()
 
 
 class ProcessTheClient(threading.Thread):
     def __init__(self, connection, address):
-        self.connection = connection
-        self.address = address
+        self.handler = ConnectionHandler(connection, address, fp)
         threading.Thread.__init__(self)
 
-    def receive_all(self, length):
-        data = b''
-        while len(data) < length:
-            packet = self.connection.recv(min(length - len(data), 4096))
-            if not packet:
-                return None
-            data += packet
-        return data
-
     def run(self):
-        while True:
-            try:
-                # First receive the command string length (4 bytes)
-                length_data = self.connection.recv(4)
-                if not length_data:
-                    break
-                    
-                # Unpack the length (network byte order)
-                command_length = struct.unpack('!I', length_data)[0]
-                
-                # Receive the command string
-                command_data = self.receive_all(command_length)
-                if not command_data:
-                    break
-                    
-                command_str = command_data.decode()
-                parts = shlex.split(command_str)
-                
-                if not parts:
-                    continue
-                    
-                command = parts[0]
-                filename = parts[1] if len(parts) > 1 else ''
-                
-                # If it's an upload command, receive the file data
-                content = None
-                if command.lower() == 'upload':
-                    # Receive file data length
-                    length_data = self.connection.recv(4)
-                    if length_data:
-                        file_length = struct.unpack('!I', length_data)[0]
-                        content = self.receive_all(file_length)
-                
-                hasil = fp.proses_string(command, filename, content)
-                hasil = json.dumps(hasil) + "\r\n\r\n"
-                self.connection.sendall(hasil.encode())
-                
-            except Exception as e:
-                logging.error(f"Error processing client request: {str(e)}")
-                break
-                
-        self.connection.close()
+        self.handler.handle_client()
 
 
 class Server(threading.Thread):
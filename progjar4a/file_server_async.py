@@ -0,0 +1,280 @@
+import asyncio
+import socket
+import logging
+import json
+import struct
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from file_protocol import FileProtocol
+from file_handler import parse_command, PAYLOAD_COMMANDS
+from file_interface import FSYNC_POLICIES
+from file_cache import FileCache, CACHE_POLICIES
+from file_budget import MemoryBudget, BudgetExceeded
+from file_transfer import CHUNKED_LENGTH, STREAM_CHUNK_SIZE, start_sink, send_sink
+fp = FileProtocol()
+
+"""
+* file_server_async melayani protokol yang sama dengan file_server_thread
+(lihat PROTOKOL.txt) di atas asyncio streams
+
+* setiap koneksi hanyalah sebuah coroutine, sehingga client keep-alive
+yang sedang idle tidak memakan thread; ribuan koneksi bisa dilayani
+dalam satu proses
+
+* operasi disk (FileProtocol/FileInterface) dijalankan di executor
+dengan jumlah thread terbatas
+
+* payload upload (UPLOAD, DELTA, UPLOAD_PART) dibaca oleh event loop;
+executor hanya menerima potongan yang sudah tiba untuk ditulis ke disk,
+satu per satu, sehingga client yang mengirim upload dengan lambat tidak
+memegang thread executor
+
+* dengan --memory-mb, buffer transfer setiap request dipesan dulu dari
+MemoryBudget seperti pada server thread; request yang menunggu memory
+menunggu di executor tersendiri, sehingga executor I/O tetap bisa
+menyelesaikan request yang sedang memegang budget
+"""
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class AsyncServer:
+    def __init__(self, ipaddress='0.0.0.0', port=8889, io_workers=32, use_sendfile=True):
+        self.ipinfo = (ipaddress, port)
+        self.use_sendfile = use_sendfile
+        # Bounded executor for disk reads/writes and JSON encoding
+        self.executor = ThreadPoolExecutor(max_workers=io_workers)
+        # Requests waiting for the memory budget block here, not in the I/O executor
+        self.admission = None
+        if fp.budget is not None:
+            self.admission = ThreadPoolExecutor(max_workers=fp.budget.max_waiters + 1)
+        logging.info(f"Async server initialized with {io_workers} I/O worker threads")
+
+    async def admit(self, command, filename, params):
+        """Reserve the request's memory, or return the error response"""
+        if self.admission is None:
+            return None, None
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.admission, fp.admit, command, filename, params), None
+        except BudgetExceeded as e:
+            return None, dict(status='ERROR', data=str(e), retry_after=e.retry_after)
+
+    def process_request(self, request_id, command, filename, params, hasil=None):
+        # Runs in the executor: file access and JSON encoding stay off the event loop
+        if hasil is None:
+            hasil = fp.proses_string(command, filename, None, params)
+        if request_id is not None:
+            hasil['request_id'] = request_id
+        if hasil.get('status') != 'OK':
+            fp.stats.add('errors')
+        stream = hasil.pop('data_stream', None)
+        response = (json.dumps(hasil) + "\r\n\r\n").encode()
+        return hasil, response, stream
+
+    async def payload_chunks(self, reader, length):
+        """Chunks of an upload payload as they arrive: length bytes, or frames for CHUNKED_LENGTH"""
+        stats = fp.stats
+        if length != CHUNKED_LENGTH:
+            remaining = length
+            while remaining > 0:
+                chunk = await reader.readexactly(min(STREAM_CHUNK_SIZE, remaining))
+                remaining -= len(chunk)
+                stats.add('bytes_received', len(chunk))
+                yield chunk
+            return
+        while True:
+            frame_remaining = struct.unpack('!I', await reader.readexactly(4))[0]
+            stats.add('bytes_received', 4)
+            if frame_remaining == 0:
+                return
+            while frame_remaining > 0:
+                chunk = await reader.readexactly(min(STREAM_CHUNK_SIZE, frame_remaining))
+                frame_remaining -= len(chunk)
+                stats.add('bytes_received', len(chunk))
+                yield chunk
+
+    async def receive_payload(self, reader, command, filename, params, length, hasil=None):
+        """Receive an upload payload, writing each chunk in the executor once it has arrived
+
+        Returns the response. When the request was already rejected
+        (hasil given) or the sink finishes early, the rest of the payload
+        is read and discarded to keep the connection in sync.
+        """
+        loop = asyncio.get_running_loop()
+        sink = fp.payload_sink(command, filename, params, None if length == CHUNKED_LENGTH else length)
+        pending = None
+        try:
+            if hasil is None:
+                hasil = await loop.run_in_executor(self.executor, start_sink, sink)
+            async for chunk in self.payload_chunks(reader, length):
+                # The next chunk is received while the previous one is written
+                if pending is not None:
+                    hasil = await pending
+                    pending = None
+                if hasil is None:
+                    pending = loop.run_in_executor(self.executor, send_sink, sink, chunk)
+            if pending is not None:
+                hasil = await pending
+                pending = None
+            if hasil is None:
+                hasil = await loop.run_in_executor(self.executor, send_sink, sink, None)
+            return hasil
+        finally:
+            if pending is not None:
+                # The sink cannot be closed while a write is still running
+                await asyncio.wait([pending])
+            # Aborts a half-written upload, e.g. when the client disconnected
+            await loop.run_in_executor(self.executor, sink.close)
+
+    async def send_stream(self, writer, stream, length):
+        loop = asyncio.get_running_loop()
+        writer.write(struct.pack('!I', length))
+        if self.use_sendfile and length > 0 and hasattr(stream, 'fileno'):
+            # loop.sendfile falls back to read/write when sendfile is unavailable;
+            # start where read_range positioned the file (ranged/resumed GETs)
+            await writer.drain()
+            await loop.sendfile(writer.transport, stream, offset=stream.tell(), count=length, fallback=True)
+            return
+        remaining = length
+        while remaining > 0:
+            chunk = await loop.run_in_executor(self.executor, stream.read, min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                raise RuntimeError("File truncated while sending")
+            writer.write(chunk)
+            remaining -= len(chunk)
+            await writer.drain()
+
+    async def send_chunked(self, writer, stream):
+        """Send a compressed stream as frames ended by a zero-length frame"""
+        loop = asyncio.get_running_loop()
+        chunks = stream.iter_chunks()
+        sent = 0
+        while True:
+            # Compression runs in the executor, off the event loop
+            chunk = await loop.run_in_executor(self.executor, next, chunks, None)
+            if chunk is None:
+                break
+            writer.write(struct.pack('!I', len(chunk)))
+            writer.write(chunk)
+            sent += 4 + len(chunk)
+            await writer.drain()
+        writer.write(struct.pack('!I', 0))
+        await writer.drain()
+        return sent + 4
+
+    async def handle_client(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        address = writer.get_extra_info('peername')
+        logging.warning(f"Connection from {address}")
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        stats = fp.stats
+        stats.add('connections')
+        stats.add('active_connections')
+
+        try:
+            while True:
+                # First receive the command string length (4 bytes)
+                length_data = await reader.readexactly(4)
+                command_length = struct.unpack('!I', length_data)[0]
+                command_data = await reader.readexactly(command_length)
+
+                stats.add('requests')
+                stats.add('bytes_received', 4 + command_length)
+                request_id, command, filename, params = parse_command(command_data.decode())
+                if command is None and request_id is None:
+                    continue
+
+                file_length = None
+                if command and command.lower() in PAYLOAD_COMMANDS:
+                    # Payload bytes are counted as they are received
+                    file_length = struct.unpack('!I', await reader.readexactly(4))[0]
+                    stats.add('bytes_received', 4)
+
+                # The reservation lasts until the response has been sent
+                reserved, hasil = await self.admit(command or '', filename, params)
+                try:
+                    if file_length is not None:
+                        hasil = await self.receive_payload(reader, command, filename, params, file_length, hasil)
+                    hasil, response, stream = await loop.run_in_executor(
+                        self.executor, self.process_request, request_id, command or '', filename,
+                        params, hasil)
+                except BaseException:
+                    fp.release(reserved)
+                    raise
+                try:
+                    writer.write(response)
+                    await writer.drain()
+                    stats.add('bytes_sent', len(response))
+                    if stream is not None and hasattr(stream, 'iter_chunks'):
+                        stats.add('bytes_sent', await self.send_chunked(writer, stream))
+                    elif stream is not None:
+                        await self.send_stream(writer, stream, hasil['data_size'])
+                        stats.add('bytes_sent', 4 + hasil['data_size'])
+                finally:
+                    if stream is not None:
+                        stream.close()
+                    fp.release(reserved)
+        except asyncio.IncompleteReadError:
+            pass
+        except Exception as e:
+            stats.add('errors')
+            logging.error(f"Error processing client request: {str(e)}")
+        finally:
+            stats.add('active_connections', -1)
+            writer.close()
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle_client, self.ipinfo[0], self.ipinfo[1],
+                                            reuse_address=True, backlog=1024)
+        logging.warning(f"Async server running on {self.ipinfo}")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='asyncio-based file server')
+    parser.add_argument('--port', type=int, default=8889, help='Port to listen on (default: 8889)')
+    parser.add_argument('--io-workers', type=int, default=32,
+                        help='Threads for disk I/O and encoding (default: 32)')
+    parser.add_argument('--sendfile', action=argparse.BooleanOptionalAction, default=True,
+                        help='Send GET data with zero-copy sendfile (default: enabled)')
+    parser.add_argument('--fsync', choices=FSYNC_POLICIES, default='file',
+                        help='fsync policy for uploads before the atomic rename (default: file)')
+    parser.add_argument('--cache-mb', type=int, default=256,
+                        help='Memory budget for the hot-file cache in MB, 0 disables it (default: 256)')
+    parser.add_argument('--cache-policy', choices=CACHE_POLICIES, default='lru',
+                        help='Eviction policy of the hot-file cache (default: lru)')
+    parser.add_argument('--memory-mb', type=int, default=1024,
+                        help='Budget for in-flight transfer buffers in MB, 0 disables it (default: 1024)')
+    parser.add_argument('--memory-queue', type=int, default=64,
+                        help='Requests that may wait for memory before new ones are rejected (default: 64)')
+    parser.add_argument('--memory-wait', type=float, default=30.0,
+                        help='Seconds a request may wait for memory before it is rejected (default: 30)')
+    args = parser.parse_args()
+
+    fp.file.fsync_policy = args.fsync
+    if args.cache_mb > 0:
+        fp.file.cache = FileCache(args.cache_mb * 1024 * 1024, args.cache_policy)
+        fp.file.cache_raw = not args.sendfile
+    if args.memory_mb > 0:
+        fp.budget = MemoryBudget(args.memory_mb * 1024 * 1024, args.memory_queue, args.memory_wait)
+    server = AsyncServer(ipaddress='0.0.0.0', port=args.port, io_workers=args.io_workers,
+                         use_sendfile=args.sendfile)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        logging.info("Shutting down server...")
+    finally:
+        server.executor.shutdown(wait=False)
+        if server.admission is not None:
+            server.admission.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
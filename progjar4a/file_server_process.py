@@ -4,161 +4,226 @@ import threading
 import logging
 import time
 import sys
-import shlex
-import json
+import os
+import signal
 import struct
 import multiprocessing
 import argparse
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
 
 from file_protocol import FileProtocol
+from file_handler import ProcessTheClient
+from file_interface import FSYNC_POLICIES
+from file_cache import FileCache, CACHE_POLICIES
+from file_budget import MemoryBudget
+from file_stats import ServerStats, create_shared_stats
 fp = FileProtocol()
 
+"""
+* file_server_process menjalankan server pre-fork: N proses worker
+yang masing-masing melakukan accept() sendiri
+
+* socket listening dibuat sekali oleh proses induk lalu diwariskan ke
+worker lewat fork, atau (dengan --reuseport) setiap worker melakukan
+bind sendiri dengan SO_REUSEPORT dan kernel yang membagi koneksi
+
+* koneksi tidak pernah dipindahkan antar proses, sehingga tidak ada
+socket yang perlu di-pickle
+
+* mode hybrid (--threads lebih dari 1): setiap proses memiliki thread
+pool sendiri seperti Server pada file_server_thread, sehingga P proses
+x T thread melayani koneksi secara bersamaan
+"""
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # Configure socket buffer sizes to match client
 SOCKET_BUFFER_SIZE = 256 * 1024 * 1024  # 256MB buffer (balanced size)
-CHUNK_SIZE = 256 * 1024 * 1024  # 256MB chunks for file transfer
-
-class ProcessTheClient:
-    def __init__(self, connection, address):
-        self.connection = connection
-        self.address = address
-        
-        # Optimize socket settings
-        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, struct.pack('i', SOCKET_BUFFER_SIZE))
-        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, struct.pack('i', SOCKET_BUFFER_SIZE))
-        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-        # Enable TCP keepalive
-        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
-        # Set TCP keepalive parameters
-        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 60)
-        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10)
-        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 6)
-
-    def receive_all(self, length):
-        data = b''
-        while len(data) < length:
-            packet = self.connection.recv(min(length - len(data), CHUNK_SIZE))
-            if not packet:
-                return None
-            data += packet
-        return data
-
-    def handle_client(self):
+
+
+def create_listen_socket(ipinfo, reuse_port=False):
+    my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    # Optimize server socket
+    my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, struct.pack('i', SOCKET_BUFFER_SIZE))
+    my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, struct.pack('i', SOCKET_BUFFER_SIZE))
+    my_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    my_socket.bind(ipinfo)
+    my_socket.listen(100)  # Increased backlog for better concurrency
+    return my_socket
+
+
+def pin_to_cpu(worker_id):
+    """Pin the current process to one CPU, round-robin over the allowed CPUs"""
+    if not hasattr(os, 'sched_setaffinity'):
+        logging.warning("CPU pinning is not supported on this platform")
+        return None
+    cpus = sorted(os.sched_getaffinity(0))
+    cpu = cpus[worker_id % len(cpus)]
+    os.sched_setaffinity(0, {cpu})
+    return cpu
+
+
+def worker_main(worker_id, listen_socket, ipinfo, use_sendfile, reuse_port, pin_cpus,
+                threads, shared_stats, num_workers):
+    """Accept loop of one pre-forked worker process"""
+    # Per-process counters, aggregated by whoever reads the shared table
+    fp.stats = ServerStats(shared_stats, worker_id, num_workers)
+    thread_pool = None
+    try:
+        if pin_cpus:
+            cpu = pin_to_cpu(worker_id)
+            logging.info(f"Worker {worker_id} (pid {os.getpid()}) pinned to CPU {cpu}")
+        if reuse_port:
+            # Every worker has its own socket; the kernel balances connections
+            listen_socket = create_listen_socket(ipinfo, reuse_port=True)
+        if threads > 1:
+            # Hybrid mode: this process serves up to `threads` connections at once
+            thread_pool = ThreadPoolExecutor(max_workers=threads)
+
         while True:
-            try:
-                # First receive the command string length (4 bytes)
-                length_data = self.connection.recv(4)
-                if not length_data:
-                    break
-                    
-                # Unpack the length (network byte order)
-                command_length = struct.unpack('!I', length_data)[0]
-                
-                # Receive the command string
-                command_data = self.receive_all(command_length)
-                if not command_data:
-                    break
-                    
-                command_str = command_data.decode()
-                parts = shlex.split(command_str)
-                
-                if not parts:
-                    continue
-                    
-                command = parts[0]
-                filename = parts[1] if len(parts) > 1 else ''
-                
-                # If it's an upload command, receive the file data
-                content = None
-                if command.lower() == 'upload':
-                    # Receive file data length
-                    length_data = self.connection.recv(4)
-                    if length_data:
-                        file_length = struct.unpack('!I', length_data)[0]
-                        content = self.receive_all(file_length)
-                
-                hasil = fp.proses_string(command, filename, content)
-                hasil = json.dumps(hasil) + "\r\n\r\n"
-                self.connection.sendall(hasil.encode())
-                
-            except Exception as e:
-                logging.error(f"Error processing client request: {str(e)}")
-                break
-                
-        self.connection.close()
+            connection, client_address = listen_socket.accept()
+            logging.warning(f"Worker {worker_id} connection from {client_address}")
+            client_handler = ProcessTheClient(connection, client_address, fp, use_sendfile)
+            if thread_pool is not None:
+                thread_pool.submit(client_handler.handle_client)
+            else:
+                client_handler.handle_client()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if thread_pool is not None:
+            thread_pool.shutdown(wait=False)
+
 
 class Server(threading.Thread):
-    def __init__(self, ipaddress='0.0.0.0', port=8889, max_workers=50):
+    def __init__(self, ipaddress='0.0.0.0', port=8889, max_workers=5, use_sendfile=True,
+                 reuse_port=False, pin_cpus=False, threads=1):
         self.ipinfo = (ipaddress, port)
-        self.my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        # Optimize server socket
-        self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, struct.pack('i', SOCKET_BUFFER_SIZE))
-        self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, struct.pack('i', SOCKET_BUFFER_SIZE))
-        self.my_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-        # Create process pool with specified number of workers
-        self.process_pool = ProcessPoolExecutor(max_workers=max_workers)
+        self.max_workers = max_workers
+        self.threads = threads
+        self.use_sendfile = use_sendfile
+        self.reuse_port = reuse_port
+        self.pin_cpus = pin_cpus
+        self.my_socket = None
+        self.workers = []
+        self.shared_stats = create_shared_stats(max_workers)
+        self.stats = ServerStats(self.shared_stats, num_workers=max_workers)
         self.running = True
-        logging.info(f"Server initialized with {max_workers} worker processes")
+        logging.info(f"Server initialized with {max_workers} worker processes x {threads} threads")
         threading.Thread.__init__(self)
 
     def stop(self):
         """Stop the server gracefully"""
         self.running = False
-        self.my_socket.close()
-        self.process_pool.shutdown(wait=True)
+        for worker in self.workers:
+            if worker.is_alive():
+                worker.terminate()
+        for worker in self.workers:
+            worker.join()
+        if self.my_socket is not None:
+            self.my_socket.close()
+        self.log_stats()
+
+    def log_stats(self):
+        """Log the per-process counters and their total"""
+        snapshot = self.stats.snapshot()
+        for worker_id, row in enumerate(snapshot['workers']):
+            logging.info(f"Worker {worker_id} stats: {row}")
+        logging.info(f"Total stats ({self.max_workers} processes x {self.threads} threads): {snapshot['total']}")
 
     def run(self):
-        logging.warning(f"Process-based server running on {self.ipinfo}")
-        self.my_socket.bind(self.ipinfo)
-        self.my_socket.listen(100)  # Increased backlog for better concurrency
-        
-        try:
-            while self.running:
-                try:
-                    self.connection, self.client_address = self.my_socket.accept()
-                    logging.warning(f"Connection from {self.client_address}")
-
-                    # Create client handler and submit to process pool
-                    client_handler = ProcessTheClient(self.connection, self.client_address)
-                    self.process_pool.submit(client_handler.handle_client)
-                except socket.error:
-                    if self.running:
-                        raise
-                    break
-                
-        except KeyboardInterrupt:
-            logging.info("Shutting down server...")
-        except Exception as e:
-            logging.error(f"Server error: {str(e)}")
-        finally:
-            self.stop()
+        logging.warning(f"Pre-fork server running on {self.ipinfo}")
+        if not self.reuse_port:
+            # One shared listening socket, inherited by every worker
+            self.my_socket = create_listen_socket(self.ipinfo)
+
+        # fork keeps the listening socket and the FileProtocol state in the children
+        context = multiprocessing.get_context('fork')
+        for worker_id in range(self.max_workers):
+            worker = context.Process(
+                target=worker_main,
+                args=(worker_id, self.my_socket, self.ipinfo, self.use_sendfile,
+                      self.reuse_port, self.pin_cpus, self.threads, self.shared_stats,
+                      self.max_workers),
+                daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+        for worker in self.workers:
+            worker.join()
+
+
+def handle_sigterm(signum, frame):
+    # Treat SIGTERM like Ctrl-C so the workers are stopped instead of orphaned
+    raise KeyboardInterrupt
+
 
 def main():
-    parser = argparse.ArgumentParser(description='Process-based file server with configurable worker count')
-    parser.add_argument('--workers', type=int, default=50, help='Number of worker processes (default: 50)')
+    parser = argparse.ArgumentParser(description='Pre-fork process-based file server with configurable worker count')
+    parser.add_argument('--processes', '--workers', dest='processes', type=int, default=5,
+                        help='Number of worker processes (default: 5)')
+    parser.add_argument('--threads', type=int, default=1,
+                        help='Threads per worker process; more than 1 enables hybrid mode (default: 1)')
     parser.add_argument('--port', type=int, default=8889, help='Port to listen on (default: 8889)')
+    parser.add_argument('--sendfile', action=argparse.BooleanOptionalAction, default=True,
+                        help='Send GET data with zero-copy sendfile (default: enabled)')
+    parser.add_argument('--fsync', choices=FSYNC_POLICIES, default='file',
+                        help='fsync policy for uploads before the atomic rename (default: file)')
+    parser.add_argument('--cache-mb', type=int, default=256,
+                        help='Memory budget for the hot-file cache in MB, split evenly across the worker '
+                             'processes, 0 disables it (default: 256)')
+    parser.add_argument('--cache-policy', choices=CACHE_POLICIES, default='lru',
+                        help='Eviction policy of the hot-file cache (default: lru)')
+    parser.add_argument('--memory-mb', type=int, default=1024,
+                        help='Budget for in-flight transfer buffers in MB, split evenly across the worker '
+                             'processes, 0 disables it (default: 1024)')
+    parser.add_argument('--memory-queue', type=int, default=64,
+                        help='Requests that may wait for memory before new ones are rejected (default: 64)')
+    parser.add_argument('--memory-wait', type=float, default=30.0,
+                        help='Seconds a request may wait for memory before it is rejected (default: 30)')
+    parser.add_argument('--reuseport', action='store_true',
+                        help='Each worker binds its own socket with SO_REUSEPORT')
+    parser.add_argument('--pin-cpus', action='store_true',
+                        help='Pin each worker process to its own CPU')
+    parser.add_argument('--stats-interval', type=int, default=0,
+                        help='Log aggregated stats every N seconds (default: 0, only at shutdown)')
     args = parser.parse_args()
 
     # Validate worker count
-    if args.workers not in [1, 5, 10]:
-        logging.error("Worker count must be 1, 5, or 10")
+    if args.processes < 1 or args.threads < 1:
+        logging.error("Process and thread counts must be at least 1")
         sys.exit(1)
 
-    server = Server(ipaddress='0.0.0.0', port=args.port, max_workers=args.workers)
+    fp.file.fsync_policy = args.fsync
+    if args.cache_mb > 0:
+        # Every worker process has its own cache: they share the budget
+        fp.file.cache = FileCache(args.cache_mb * 1024 * 1024 // args.processes, args.cache_policy)
+        fp.file.cache_raw = not args.sendfile
+    if args.memory_mb > 0:
+        # Like the cache, every worker process holds its share of the budget
+        fp.budget = MemoryBudget(args.memory_mb * 1024 * 1024 // args.processes, args.memory_queue, args.memory_wait)
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    server = Server(ipaddress='0.0.0.0', port=args.port, max_workers=args.processes,
+                    use_sendfile=args.sendfile, reuse_port=args.reuseport, pin_cpus=args.pin_cpus,
+                    threads=args.threads)
     server.start()
 
     try:
         # Keep the main thread alive
+        elapsed = 0
         while True:
             time.sleep(1)
+            elapsed += 1
+            if args.stats_interval and elapsed % args.stats_interval == 0:
+                server.log_stats()
     except KeyboardInterrupt:
         logging.info("Shutting down server...")
         server.stop()
         server.join()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -8,9 +8,14 @@ import shlex
 import json
 import struct
 import argparse
-from concurrent.futures import ThreadPoolExecutor
 
 from file_protocol import FileProtocol
+from file_handler import ProcessTheClient
+from file_interface import FSYNC_POLICIES
+from file_cache import FileCache, CACHE_POLICIES
+from file_budget import MemoryBudget
+from file_scheduler import LaneScheduler
+from file_pool import AdaptivePool
 fp = FileProtocol()
 
 # Configure logging
@@ -18,97 +23,51 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 
 # Configure socket buffer sizes to match client
 SOCKET_BUFFER_SIZE = 256 * 1024 * 1024  # 256MB buffer (balanced size)
-CHUNK_SIZE = 256 * 1024 * 1024  # 256MB chunks for file transfer
 
-class ProcessTheClient:
-    def __init__(self, connection, address):
-        self.connection = connection
-        self.address = address
-        
-        # Optimize socket settings
-        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, struct.pack('i', SOCKET_BUFFER_SIZE))
-        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, struct.pack('i', SOCKET_BUFFER_SIZE))
-        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-        # Enable TCP keepalive
-        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
-        # Set TCP keepalive parameters
-        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 60)
-        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10)
-        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 6)
-
-    def receive_all(self, length):
-        data = b''
-        while len(data) < length:
-            packet = self.connection.recv(min(length - len(data), CHUNK_SIZE))
-            if not packet:
-                return None
-            data += packet
-        return data
-
-    def handle_client(self):
-        while True:
-            try:
-                # First receive the command string length (4 bytes)
-                length_data = self.connection.recv(4)
-                if not length_data:
-                    break
-                    
-                # Unpack the length (network byte order)
-                command_length = struct.unpack('!I', length_data)[0]
-                
-                # Receive the command string
-                command_data = self.receive_all(command_length)
-                if not command_data:
-                    break
-                    
-                command_str = command_data.decode()
-                parts = shlex.split(command_str)
-                
-                if not parts:
-                    continue
-                    
-                command = parts[0]
-                filename = parts[1] if len(parts) > 1 else ''
-                
-                # If it's an upload command, receive the file data
-                content = None
-                if command.lower() == 'upload':
-                    # Receive file data length
-                    length_data = self.connection.recv(4)
-                    if length_data:
-                        file_length = struct.unpack('!I', length_data)[0]
-                        content = self.receive_all(file_length)
-                
-                hasil = fp.proses_string(command, filename, content)
-                hasil = json.dumps(hasil) + "\r\n\r\n"
-                self.connection.sendall(hasil.encode())
-                
-            except Exception as e:
-                logging.error(f"Error processing client request: {str(e)}")
-                break
-                
-        self.connection.close()
+# Worker threads kept alive when idle, unless --threads is smaller
+DEFAULT_MIN_THREADS = 4
 
 class Server(threading.Thread):
-    def __init__(self, ipaddress='0.0.0.0', port=8889, max_workers=50):
+    def __init__(self, ipaddress='0.0.0.0', port=8889, max_workers=50, use_sendfile=True, control_workers=0,
+                 min_workers=None, cooldown=10.0):
         self.ipinfo = (ipaddress, port)
+        self.use_sendfile = use_sendfile
         self.my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         # Optimize server socket
         self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, struct.pack('i', SOCKET_BUFFER_SIZE))
         self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, struct.pack('i', SOCKET_BUFFER_SIZE))
         self.my_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-        # Create thread pool with specified number of workers
-        self.thread_pool = ThreadPoolExecutor(max_workers=max_workers)
+        # Pools grow from min_workers up to their maximum under load and
+        # shrink back after cooldown seconds of idleness; fixed when min == max
+        if min_workers is None:
+            min_workers = max_workers
+        if control_workers > 0:
+            # Requests are scheduled per command: small control commands get
+            # their own workers, max_workers is the size of the bulk lane
+            pools = dict(control=AdaptivePool(min(min_workers, control_workers), control_workers, cooldown, 'lane-control'),
+                         bulk=AdaptivePool(min_workers, max_workers, cooldown, 'lane-bulk'))
+            self.scheduler = LaneScheduler(fp, pools, use_sendfile)
+            self.thread_pool = None
+            fp.reporters['lanes'] = self.scheduler.stats
+            logging.info(f"Server initialized with up to {control_workers} control and {max_workers} bulk worker threads")
+        else:
+            # One worker thread per connection for its whole lifetime
+            self.scheduler = None
+            self.thread_pool = AdaptivePool(min_workers, max_workers, cooldown, 'worker')
+            fp.reporters['pool'] = self.thread_pool.stats
+            logging.info(f"Server initialized with {min_workers} to {max_workers} worker threads")
         self.running = True
-        logging.info(f"Server initialized with {max_workers} worker threads")
         threading.Thread.__init__(self)
 
     def stop(self):
         """Stop the server gracefully"""
         self.running = False
         self.my_socket.close()
-        self.thread_pool.shutdown(wait=True)
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        else:
+            self.thread_pool.shutdown(wait=True)
 
     def run(self):
         logging.warning(f"Thread-based server running on {self.ipinfo}")
@@ -121,8 +80,11 @@ class Server(threading.Thread):
                     self.connection, self.client_address = self.my_socket.accept()
                     logging.warning(f"Connection from {self.client_address}")
 
+                    if self.scheduler is not None:
+                        self.scheduler.add(self.connection, self.client_address)
+                        continue
                     # Create client handler and submit to thread pool
-                    client_handler = ProcessTheClient(self.connection, self.client_address)
+                    client_handler = ProcessTheClient(self.connection, self.client_address, fp, self.use_sendfile)
                     self.thread_pool.submit(client_handler.handle_client)
                 except socket.error:
                     if self.running:
@@ -138,16 +100,53 @@ class Server(threading.Thread):
 
 def main():
     parser = argparse.ArgumentParser(description='Thread-based file server with configurable worker count')
-    parser.add_argument('--workers', type=int, default=50, help='Number of worker threads (default: 50)')
+    parser.add_argument('--threads', '--workers', dest='threads', type=int, default=50,
+                        help='Maximum number of worker threads, or bulk-lane workers with lanes (default: 50)')
+    parser.add_argument('--min-threads', type=int, default=None,
+                        help='Worker threads kept when idle; the pool grows to --threads under load '
+                             '(default: 4, or --threads if smaller)')
+    parser.add_argument('--pool-cooldown', type=float, default=10.0,
+                        help='Seconds a worker stays idle, and since the last growth, before the pool shrinks (default: 10)')
+    parser.add_argument('--lanes', action=argparse.BooleanOptionalAction, default=True,
+                        help='Schedule control commands and bulk transfers on separate worker lanes (default: enabled)')
+    parser.add_argument('--control-threads', type=int, default=8,
+                        help='Maximum worker threads of the control lane (default: 8)')
     parser.add_argument('--port', type=int, default=8889, help='Port to listen on (default: 8889)')
+    parser.add_argument('--sendfile', action=argparse.BooleanOptionalAction, default=True,
+                        help='Send GET data with zero-copy sendfile (default: enabled)')
+    parser.add_argument('--fsync', choices=FSYNC_POLICIES, default='file',
+                        help='fsync policy for uploads before the atomic rename (default: file)')
+    parser.add_argument('--cache-mb', type=int, default=256,
+                        help='Memory budget for the hot-file cache in MB, 0 disables it (default: 256)')
+    parser.add_argument('--cache-policy', choices=CACHE_POLICIES, default='lru',
+                        help='Eviction policy of the hot-file cache (default: lru)')
+    parser.add_argument('--memory-mb', type=int, default=1024,
+                        help='Budget for in-flight transfer buffers in MB, 0 disables it (default: 1024)')
+    parser.add_argument('--memory-queue', type=int, default=64,
+                        help='Requests that may wait for memory before new ones are rejected (default: 64)')
+    parser.add_argument('--memory-wait', type=float, default=30.0,
+                        help='Seconds a request may wait for memory before it is rejected (default: 30)')
     args = parser.parse_args()
 
     # Validate worker count
-    if args.workers not in [1, 5, 50]:
-        logging.error("Worker count must be 1, 5, or 50")
+    if args.threads < 1 or (args.lanes and args.control_threads < 1):
+        logging.error("Worker count must be at least 1")
+        sys.exit(1)
+    if args.min_threads is None:
+        args.min_threads = min(DEFAULT_MIN_THREADS, args.threads)
+    if not 0 <= args.min_threads <= args.threads:
+        logging.error("--min-threads must be between 0 and --threads")
         sys.exit(1)
 
-    svr = Server(ipaddress='0.0.0.0', port=args.port, max_workers=args.workers)
+    fp.file.fsync_policy = args.fsync
+    if args.cache_mb > 0:
+        fp.file.cache = FileCache(args.cache_mb * 1024 * 1024, args.cache_policy)
+        fp.file.cache_raw = not args.sendfile
+    if args.memory_mb > 0:
+        fp.budget = MemoryBudget(args.memory_mb * 1024 * 1024, args.memory_queue, args.memory_wait)
+    svr = Server(ipaddress='0.0.0.0', port=args.port, max_workers=args.threads, use_sendfile=args.sendfile,
+                 control_workers=args.control_threads if args.lanes else 0,
+                 min_workers=args.min_threads, cooldown=args.pool_cooldown)
     svr.start()
 
     try:
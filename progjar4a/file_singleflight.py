@@ -0,0 +1,66 @@
+import threading
+
+"""
+* class SingleFlight menggabungkan pemanggilan yang identik dan sedang
+berjalan bersamaan: hanya satu thread (leader) yang benar-benar
+mengerjakan, thread lain dengan key yang sama menunggu dan memakai
+hasil yang sama
+
+* dipakai FileInterface agar banyak client yang meminta file yang sama
+pada saat bersamaan hanya menyebabkan satu kali baca disk dan satu kali
+encode
+
+* hasil tidak disimpan setelah selesai; request yang datang sesudahnya
+memulai pemanggilan baru (atau dilayani oleh FileCache)
+"""
+
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flights = {}
+        self.leaders = 0
+        self.joined = 0
+
+    def do(self, key, fn):
+        """Run fn() once for all concurrent callers with the same key
+
+        Callers that arrive while the call is running wait for it and get
+        the same result, or the same exception.
+        """
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Flight()
+                self.leaders += 1
+            else:
+                self.joined += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+
+    def stats(self):
+        with self.lock:
+            return dict(leaders=self.leaders, joined=self.joined, in_flight=len(self.flights))
@@ -0,0 +1,53 @@
+import threading
+import multiprocessing
+
+"""
+* class ServerStats menghitung statistik server (koneksi, request,
+error, byte masuk/keluar, kompresi) dan dikembalikan oleh command STATS
+
+* pada server multi-proses setiap worker menulis ke barisnya sendiri
+di sebuah multiprocessing.Array, sehingga statistik semua proses bisa
+dijumlahkan dari proses mana pun
+"""
+
+STAT_FIELDS = ('connections', 'active_connections', 'requests', 'errors', 'bytes_received', 'bytes_sent',
+               # Compressed transfers: uncompressed and on-the-wire bytes, CPU time spent
+               'compressed_transfers', 'compression_skipped', 'compression_bytes',
+               'compression_wire_bytes', 'compression_cpu_us')
+
+
+def create_shared_stats(num_workers):
+    """Shared counter table with one row per worker process (inherited via fork)"""
+    context = multiprocessing.get_context('fork')
+    return context.Array('q', num_workers * len(STAT_FIELDS), lock=False)
+
+
+class ServerStats:
+    def __init__(self, shared=None, worker_id=0, num_workers=1):
+        self.lock = threading.Lock()
+        self.shared = shared
+        self.worker_id = worker_id
+        self.num_workers = num_workers
+        if shared is None:
+            self.counters = [0] * len(STAT_FIELDS)
+            self.offset = 0
+        else:
+            # Each process only ever writes its own row of the shared table
+            self.counters = shared
+            self.offset = worker_id * len(STAT_FIELDS)
+
+    def add(self, field, amount=1):
+        index = self.offset + STAT_FIELDS.index(field)
+        with self.lock:
+            self.counters[index] += amount
+
+    def row(self, worker_id):
+        start = worker_id * len(STAT_FIELDS)
+        return dict(zip(STAT_FIELDS, self.counters[start:start + len(STAT_FIELDS)]))
+
+    def snapshot(self):
+        if self.shared is None:
+            return self.row(0)
+        workers = [self.row(worker_id) for worker_id in range(self.num_workers)]
+        total = {field: sum(row[field] for row in workers) for field in STAT_FIELDS}
+        return dict(total=total, workers=workers)
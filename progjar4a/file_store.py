@@ -0,0 +1,194 @@
+import os
+import json
+import uuid
+import fcntl
+import hashlib
+from contextlib import contextmanager
+
+"""
+* class BlobStore menyimpan isi file berdasarkan hash sha256-nya
+(content-addressed) di direktori tersembunyi .blobs/
+
+* setiap nama file di direktori files adalah hard link ke blob-nya,
+sehingga GET, sendfile, cache dan mmap tetap membaca file biasa, dan
+isi yang sama hanya disimpan sekali di disk
+
+* index nama -> hash disimpan di direktori .index/, satu file kecil per
+nama (nama file index adalah sha256 dari nama file), sehingga setiap
+perubahan hanya menulis satu entri, bukan seluruh index
+
+* semua perubahan link dan index dilakukan di bawah file lock eksklusif
+sehingga aman dipakai oleh beberapa proses server sekaligus; pembacaan
+index (lookup) cukup memakai lock shared
+
+* .index.json dari versi lama dipindahkan ke .index/ saat store dibuka
+
+* blob yang tidak lagi dipakai oleh nama mana pun (st_nlink == 1)
+langsung dihapus
+"""
+
+BLOB_DIR = '.blobs'
+INDEX_DIR = '.index'
+# Whole-file index of older versions, migrated on first use
+LEGACY_INDEX_FILE = '.index.json'
+LOCK_FILE = '.index.lock'
+
+
+def is_digest(digest):
+    return len(digest) == 64 and all(c in '0123456789abcdef' for c in digest)
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class BlobStore:
+    def __init__(self, directory='.'):
+        self.directory = directory
+        self.blob_dir = os.path.join(directory, BLOB_DIR)
+        self.index_dir = os.path.join(directory, INDEX_DIR)
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.index_dir, exist_ok=True)
+        self.migrate()
+
+    def blob_path(self, digest):
+        if not is_digest(digest):
+            raise ValueError('Invalid sha256 digest')
+        return os.path.join(self.blob_dir, digest)
+
+    def have(self, digest):
+        return os.path.exists(self.blob_path(digest))
+
+    @contextmanager
+    def locked(self, mode=fcntl.LOCK_EX):
+        """Hold the store lock: exclusive to change links, shared to read"""
+        with open(os.path.join(self.directory, LOCK_FILE), 'a') as lock_fp:
+            fcntl.flock(lock_fp, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_fp, fcntl.LOCK_UN)
+
+    def entry_path(self, filename):
+        # Any file name maps to a fixed-length, flat entry name
+        key = hashlib.sha256(filename.encode(errors='surrogateescape')).hexdigest()
+        return os.path.join(self.index_dir, key)
+
+    def read_entry(self, filename):
+        try:
+            with open(self.entry_path(filename)) as fp:
+                return fp.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def write_entry(self, filename, digest):
+        # Caller holds the lock; the rename keeps readers from seeing half an entry
+        entry_path = self.entry_path(filename)
+        temp_path = f"{entry_path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, 'w') as fp:
+            fp.write(digest)
+        os.replace(temp_path, entry_path)
+
+    def remove_entry(self, filename):
+        # Caller holds the lock
+        try:
+            os.remove(self.entry_path(filename))
+        except FileNotFoundError:
+            pass
+
+    def migrate(self):
+        """Move a legacy .index.json into one entry per name"""
+        legacy_path = os.path.join(self.directory, LEGACY_INDEX_FILE)
+        if not os.path.exists(legacy_path):
+            return
+        with self.locked():
+            if not os.path.exists(legacy_path):
+                # Another process migrated it first
+                return
+            with open(legacy_path) as fp:
+                index = json.load(fp)
+            for filename, digest in index.items():
+                self.write_entry(filename, digest)
+            os.remove(legacy_path)
+
+    def collect(self, digest):
+        # Caller holds the lock: drop the blob once no name links to it
+        try:
+            if os.stat(self.blob_path(digest)).st_nlink <= 1:
+                os.remove(self.blob_path(digest))
+        except FileNotFoundError:
+            pass
+
+    def commit(self, temp_path, filename, digest, replace):
+        """Move a fully written temp file to filename through the blob for digest
+
+        replace(temp_path, filename, deduplicated) performs the final
+        rename. The caller fsyncs the data before calling commit, so the
+        store lock only covers links, renames and the index. When the
+        blob already exists the temp file's data is discarded and
+        filename becomes another link to it. Returns True if the content
+        was deduplicated.
+        """
+        blob = self.blob_path(digest)
+        with self.locked():
+            deduplicated = os.path.exists(blob)
+            if deduplicated:
+                os.remove(temp_path)
+                os.link(blob, temp_path)
+            else:
+                os.link(temp_path, blob)
+            try:
+                replace(temp_path, filename, deduplicated)
+            except BaseException:
+                # Do not keep a blob that no name refers to
+                if not deduplicated:
+                    os.remove(blob)
+                raise
+            self.discard(temp_path)
+            self.relink(filename, digest)
+        return deduplicated
+
+    def link(self, digest, filename):
+        """Point filename at an existing blob without any data transfer"""
+        blob = self.blob_path(digest)
+        with self.locked():
+            if not os.path.exists(blob):
+                return False
+            temp_path = os.path.join(os.path.dirname(filename) or '.',
+                                     f".{os.path.basename(filename)}.{uuid.uuid4().hex}.tmp")
+            os.link(blob, temp_path)
+            os.replace(temp_path, filename)
+            self.discard(temp_path)
+            self.relink(filename, digest)
+        return True
+
+    def discard(self, temp_path):
+        # rename() is a no-op when both names already link the same blob
+        # (the same content stored again), leaving the temp link behind
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    def relink(self, filename, digest):
+        # Caller holds the lock
+        old_digest = self.read_entry(filename)
+        if old_digest != digest:
+            self.write_entry(filename, digest)
+        if old_digest is not None and old_digest != digest:
+            self.collect(old_digest)
+
+    def remove(self, filename):
+        """Delete filename and release its blob"""
+        with self.locked():
+            os.remove(filename)
+            old_digest = self.read_entry(filename)
+            self.remove_entry(filename)
+            if old_digest is not None:
+                self.collect(old_digest)
+
+    def lookup(self, filename):
+        with self.locked(fcntl.LOCK_SH):
+            return self.read_entry(filename)
@@ -0,0 +1,466 @@
+import os
+import io
+import mmap
+import tarfile
+import struct
+import base64
+import json
+
+"""
+* modul file_transfer berisi helper untuk framing data di atas socket
+yang dipakai bersama oleh server dan client
+
+* setiap frame binary dikirim dengan format [4-byte length][data],
+length dalam network byte order
+
+* isi file dikirim per potongan (chunk) berukuran tetap sehingga
+memory yang dipakai per transfer tidak bergantung pada ukuran file
+"""
+
+# Fixed-size chunks used when streaming file data from/to disk
+STREAM_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+RESPONSE_TERMINATOR = b"\r\n\r\n"
+
+# os.sendfile is not available on every platform (e.g. Windows)
+SENDFILE_AVAILABLE = hasattr(os, 'sendfile')
+
+# Reads at least this large are served from an mmap of the file instead
+# of being copied into a fresh bytes object
+MMAP_THRESHOLD = 4 * 1024 * 1024  # 4MB
+
+# Payload length announcing a chunked payload: a series of frames ended
+# by a zero-length frame, for data whose size is not known up front
+CHUNKED_LENGTH = 0xFFFFFFFF
+# Largest body a single length-prefixed frame can carry
+MAX_FRAME_SIZE = CHUNKED_LENGTH - 1
+
+
+def recv_exact(sock, length):
+    """Receive exactly length bytes, or None if the peer closed the connection"""
+    data = bytearray(length)
+    view = memoryview(data)
+    received = 0
+    while received < length:
+        nbytes = sock.recv_into(view[received:], length - received)
+        if nbytes == 0:
+            return None
+        received += nbytes
+    return bytes(data)
+
+
+def recv_length(sock):
+    """Receive a 4-byte length prefix, or None if the peer closed the connection"""
+    length_data = recv_exact(sock, 4)
+    if length_data is None:
+        return None
+    return struct.unpack('!I', length_data)[0]
+
+
+def send_frame(sock, data):
+    """Send data as a single length-prefixed frame"""
+    sock.sendall(struct.pack('!I', len(data)))
+    sock.sendall(data)
+
+
+def _has_fileno(fileobj):
+    try:
+        fileobj.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        return False
+    return True
+
+
+def _can_sendfile(fileobj):
+    return SENDFILE_AVAILABLE and _has_fileno(fileobj)
+
+
+def send_stream(sock, fileobj, length, chunk_size=STREAM_CHUNK_SIZE, use_sendfile=False):
+    """Send length bytes of fileobj as a length-prefixed frame, chunk by chunk
+
+    With use_sendfile the kernel copies the file to the socket directly
+    (zero-copy); otherwise, or when the file/socket does not support it,
+    the data goes through a Python buffer chunk by chunk.
+    """
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"{length} bytes do not fit in one frame (at most {MAX_FRAME_SIZE})")
+    sock.sendall(struct.pack('!I', length))
+    if use_sendfile and length > 0 and _can_sendfile(fileobj):
+        # socket.sendfile itself falls back to send() if os.sendfile fails
+        sent = sock.sendfile(fileobj, offset=fileobj.tell(), count=length)
+        if sent != length:
+            raise RuntimeError("File truncated while sending")
+        return
+    if length >= MMAP_THRESHOLD and _has_fileno(fileobj):
+        # Large files go to the socket straight from the page cache
+        stream = map_file(fileobj, fileobj.tell(), length)
+        try:
+            sock.sendall(stream.read())
+        finally:
+            stream.close()
+        return
+    remaining = length
+    while remaining > 0:
+        chunk = fileobj.read(min(chunk_size, remaining))
+        if not chunk:
+            raise RuntimeError("File truncated while sending")
+        sock.sendall(chunk)
+        remaining -= len(chunk)
+
+
+def send_chunked(sock, chunks):
+    """Send an iterable of byte chunks as frames ended by a zero-length frame
+
+    Returns the number of bytes put on the wire.
+    """
+    sent = 0
+    for chunk in chunks:
+        if chunk:
+            send_frame(sock, chunk)
+            sent += 4 + len(chunk)
+    sock.sendall(struct.pack('!I', 0))
+    return sent + 4
+
+
+class BufferStream:
+    """File-like view over bytes already in memory, e.g. a cached file
+
+    read() returns memoryview slices, so send_stream passes the cached
+    bytes to sendall() without copying them.
+    """
+
+    def __init__(self, data, offset=0, length=None):
+        self.view = memoryview(data)[offset:]
+        if length is not None:
+            self.view = self.view[:length]
+        self.position = 0
+
+    def read(self, size=-1):
+        end = len(self.view) if size < 0 else min(len(self.view), self.position + size)
+        chunk = self.view[self.position:end]
+        self.position = end
+        return chunk
+
+    def tell(self):
+        return self.position
+
+    def seek(self, position):
+        self.position = position
+
+    def close(self):
+        pass
+
+
+class MappedStream(BufferStream):
+    """BufferStream over a read-only mmap of a file"""
+
+    def __init__(self, mapping, offset, length):
+        BufferStream.__init__(self, mapping, offset, length)
+        self.mapping = mapping
+
+    def close(self):
+        self.view.release()
+        try:
+            self.mapping.close()
+        except BufferError:
+            # A slice handed out by read() is still alive; the map is
+            # closed when it is garbage collected
+            pass
+
+
+def map_file(fileobj, offset, length):
+    """Map length bytes of fileobj from offset, hinting sequential readahead
+
+    Concurrent readers of the same file share its page-cache pages
+    instead of each holding a private copy.
+    """
+    mapping = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mmap, 'MADV_SEQUENTIAL'):
+        mapping.madvise(mmap.MADV_SEQUENTIAL)
+    if hasattr(os, 'posix_fadvise'):
+        os.posix_fadvise(fileobj.fileno(), offset, length, os.POSIX_FADV_SEQUENTIAL)
+    return MappedStream(mapping, offset, length)
+
+
+class TarStream:
+    """Stream files as a tar archive, chunk by chunk
+
+    Headers are built with tarfile.TarInfo and file data is read in
+    STREAM_CHUNK_SIZE pieces, so any tarfile reader in stream mode
+    ('r|') can unpack it while it arrives. Small files are batched into
+    one chunk. A file that disappears before it is sent is skipped.
+    opener(name) opens a file for reading.
+    """
+
+    def __init__(self, names, opener=None):
+        self.names = names
+        self.opener = opener if opener is not None else (lambda name: open(name, 'rb'))
+        self.files_sent = 0
+
+    def iter_chunks(self, chunk_size=STREAM_CHUNK_SIZE):
+        pending = bytearray()
+        for name in self.names:
+            try:
+                fp = self.opener(name)
+            except FileNotFoundError:
+                continue
+            with fp:
+                st = os.fstat(fp.fileno())
+                info = tarfile.TarInfo(name)
+                info.size = st.st_size
+                info.mtime = int(st.st_mtime)
+                info.mode = 0o644
+                pending += info.tobuf()
+                remaining = st.st_size
+                while remaining > 0:
+                    data = fp.read(min(chunk_size, remaining))
+                    if not data:
+                        raise RuntimeError("File truncated while sending")
+                    pending += data
+                    remaining -= len(data)
+                    if len(pending) >= chunk_size:
+                        yield bytes(pending)
+                        pending.clear()
+                # File data is padded to whole 512-byte blocks
+                pending += bytes(-st.st_size % tarfile.BLOCKSIZE)
+            self.files_sent += 1
+        # End of archive: two zero blocks
+        pending += bytes(2 * tarfile.BLOCKSIZE)
+        yield bytes(pending)
+
+    def close(self):
+        pass
+
+
+class IterReader(io.RawIOBase):
+    """Read-only file object over an iterator of byte chunks"""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.pending = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.pending:
+            self.pending = next(self.chunks, None)
+            if self.pending is None:
+                self.pending = b''
+                return 0
+        nbytes = min(len(buffer), len(self.pending))
+        buffer[:nbytes] = self.pending[:nbytes]
+        self.pending = self.pending[nbytes:]
+        return nbytes
+
+    def drain(self):
+        """Consume the rest of the chunks"""
+        for _ in self.chunks:
+            pass
+
+
+class IncomingPayload:
+    """A length-prefixed payload that is still waiting on the socket
+
+    The payload is received with recv_into into a reusable buffer and
+    handed to the consumer chunk by chunk, so it is never held in memory
+    as a whole.
+    """
+
+    def __init__(self, sock, length, buffer=None):
+        self.sock = sock
+        self.length = length
+        self.remaining = length
+        self.buffer = buffer if buffer is not None else bytearray(STREAM_CHUNK_SIZE)
+
+    def iter_chunks(self):
+        view = memoryview(self.buffer)
+        while self.remaining > 0:
+            nbytes = self.sock.recv_into(view, min(len(view), self.remaining))
+            if nbytes == 0:
+                raise ConnectionError("Connection closed before payload was complete")
+            self.remaining -= nbytes
+            # The view is only valid until the next iteration
+            yield view[:nbytes]
+
+    def drain(self):
+        """Discard whatever the consumer did not read, keeping the stream in sync"""
+        for _ in self.iter_chunks():
+            pass
+
+
+class ChunkedPayload(IncomingPayload):
+    """A payload sent as frames ended by a zero-length frame (CHUNKED_LENGTH)
+
+    length is unknown until the last frame arrives; received counts the
+    bytes taken off the wire so far.
+    """
+
+    def __init__(self, sock, buffer=None):
+        IncomingPayload.__init__(self, sock, None, buffer)
+        self.remaining = None
+        self.received = 0
+        self.finished = False
+
+    def next_frame_length(self):
+        length = recv_length(self.sock)
+        if length is None:
+            raise ConnectionError("Connection closed before payload was complete")
+        return length
+
+    def iter_chunks(self):
+        view = memoryview(self.buffer)
+        while not self.finished:
+            frame_remaining = self.next_frame_length()
+            self.received += 4
+            if frame_remaining == 0:
+                self.finished = True
+                break
+            while frame_remaining > 0:
+                nbytes = self.sock.recv_into(view, min(len(view), frame_remaining))
+                if nbytes == 0:
+                    raise ConnectionError("Connection closed before payload was complete")
+                frame_remaining -= nbytes
+                self.received += nbytes
+                # The view is only valid until the next iteration
+                yield view[:nbytes]
+
+
+def start_sink(sink):
+    """Run a payload sink up to the point where it wants the first chunk
+
+    A sink is a generator that receives the payload with send(chunk),
+    then send(None) at the end, and returns the response. Returns the
+    response if the sink already finished (e.g. invalid parameters),
+    None otherwise.
+    """
+    try:
+        next(sink)
+    except StopIteration as e:
+        return e.value
+    return None
+
+
+def send_sink(sink, chunk):
+    """Pass one chunk (None: end of payload) to a sink; the response once it is done"""
+    try:
+        sink.send(chunk)
+    except StopIteration as e:
+        return e.value
+    if chunk is None:
+        raise RuntimeError("Payload sink did not finish at the end of the payload")
+    return None
+
+
+def feed(sink, content):
+    """Run a sink over bytes/str content or over a payload still on the socket
+
+    The sink may finish before the payload is consumed; the caller
+    drains the rest.
+    """
+    chunks = iter([content] if isinstance(content, (bytes, str)) else content.iter_chunks())
+    try:
+        hasil = start_sink(sink)
+        while hasil is None:
+            hasil = send_sink(sink, next(chunks, None))
+        return hasil
+    finally:
+        # Aborts whatever a sink left half done, e.g. when the connection dropped
+        sink.close()
+
+
+class Base64StreamDecoder:
+    """Decode base64 that arrives in arbitrarily sized chunks"""
+
+    def __init__(self):
+        self.pending = b''
+
+    def decode(self, chunk):
+        # FileInterface.upload may be called with the base64 text as a str
+        data = self.pending + (chunk.encode() if isinstance(chunk, str) else bytes(chunk))
+        usable = len(data) - len(data) % 4
+        self.pending = data[usable:]
+        return base64.b64decode(data[:usable])
+
+    def flush(self):
+        if self.pending:
+            raise ValueError("Incomplete base64 data")
+        return b''
+
+
+class SocketReader:
+    """Incremental reader for the client side of a connection
+
+    Received bytes are appended to one growing buffer and only the new
+    bytes are scanned for the response terminator, so reading a large
+    JSON response costs O(n) instead of rescanning the whole buffer on
+    every recv(). A JSON response and a following binary frame can
+    arrive in the same recv(), so bytes read past the terminator are
+    kept for the next call instead of being dropped.
+    """
+
+    def __init__(self, sock, recv_size=STREAM_CHUNK_SIZE):
+        self.sock = sock
+        self.recv_size = recv_size
+        self.buffer = bytearray()
+        # Bytes of the buffer already searched for the terminator
+        self.scanned = 0
+
+    def fill(self):
+        chunk = self.sock.recv(self.recv_size)
+        if not chunk:
+            raise ConnectionError("Connection closed before response was complete")
+        self.buffer += chunk
+
+    def read_until(self, terminator=RESPONSE_TERMINATOR):
+        while True:
+            index = self.buffer.find(terminator, self.scanned)
+            if index >= 0:
+                break
+            # The terminator may straddle the boundary with the next chunk
+            self.scanned = max(0, len(self.buffer) - len(terminator) + 1)
+            self.fill()
+        data = bytes(self.buffer[:index])
+        del self.buffer[:index + len(terminator)]
+        self.scanned = 0
+        return data
+
+    def read_json(self):
+        """Read one JSON response; json.loads decodes the bytes in the same pass"""
+        return json.loads(self.read_until())
+
+    def read_exact(self, length):
+        while len(self.buffer) < length:
+            self.fill()
+        data = bytes(self.buffer[:length])
+        del self.buffer[:length]
+        self.scanned = 0
+        return data
+
+    def read_length(self):
+        return struct.unpack('!I', self.read_exact(4))[0]
+
+    def iter_frame(self, chunk_size=STREAM_CHUNK_SIZE):
+        """Yield the payload of the next length-prefixed frame in chunks"""
+        return self.iter_body(self.read_length(), chunk_size)
+
+    def iter_chunked(self, chunk_size=STREAM_CHUNK_SIZE):
+        """Yield the payload of frames up to the ending zero-length frame"""
+        while True:
+            length = self.read_length()
+            if length == 0:
+                return
+            yield from self.iter_body(length, chunk_size)
+
+    def iter_body(self, remaining, chunk_size=STREAM_CHUNK_SIZE):
+        if self.buffer:
+            chunk = bytes(self.buffer[:remaining])
+            del self.buffer[:remaining]
+            remaining -= len(chunk)
+            yield chunk
+        while remaining > 0:
+            chunk = self.sock.recv(min(chunk_size, remaining))
+            if not chunk:
+                raise ConnectionError("Connection closed before frame was complete")
+            remaining -= len(chunk)
+            yield chunk
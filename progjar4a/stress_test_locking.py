@@ -0,0 +1,185 @@
+import argparse
+import base64
+import hashlib
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+from file_interface import FileInterface
+from file_locks import FileLockManager
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Versions of the shared file that writers keep swapping in
+NUM_VERSIONS = 4
+
+def make_versions(size: int) -> Dict[str, bytes]:
+    """Distinct file contents keyed by their sha256"""
+    versions = {}
+    for version in range(NUM_VERSIONS):
+        content = bytes([version]) * 16 + os.urandom(size - 16)
+        versions[hashlib.sha256(content).hexdigest()] = content
+    return versions
+
+def check_shared_readers(locks: FileLockManager, readers: int) -> bool:
+    """All readers of one name must be able to hold the lock at the same time"""
+    barrier = threading.Barrier(readers, timeout=5)
+
+    def reader():
+        with locks.reading('same.bin'):
+            barrier.wait()
+
+    try:
+        with ThreadPoolExecutor(max_workers=readers) as executor:
+            for future in [executor.submit(reader) for _ in range(readers)]:
+                future.result()
+        return True
+    except threading.BrokenBarrierError:
+        return False
+
+def check_exclusive_writers(locks: FileLockManager, writers: int, rounds: int) -> bool:
+    """Writers of one name never overlap with each other or with readers"""
+    inside = [0, 0]  # readers, writers
+    state_lock = threading.Lock()
+    violations = []
+
+    def enter(kind):
+        with state_lock:
+            inside[kind] += 1
+            if inside[1] > 1 or (inside[1] and inside[0]):
+                violations.append(tuple(inside))
+
+    def leave(kind):
+        with state_lock:
+            inside[kind] -= 1
+
+    def worker(worker_id):
+        rng = random.Random(worker_id)
+        for _ in range(rounds):
+            if rng.random() < 0.5:
+                with locks.writing('same.bin'):
+                    enter(1)
+                    time.sleep(0.0001)
+                    leave(1)
+            else:
+                with locks.reading('same.bin'):
+                    enter(0)
+                    time.sleep(0.0001)
+                    leave(0)
+
+    with ThreadPoolExecutor(max_workers=writers) as executor:
+        for future in [executor.submit(worker, i) for i in range(writers)]:
+            future.result()
+    return not violations and locks.stats()['active'] == 0
+
+def check_unrelated_names(locks: FileLockManager) -> bool:
+    """A writer holding one name must not delay readers of another"""
+    with locks.writing('busy.bin'):
+        done = threading.Event()
+
+        def reader():
+            with locks.reading('other.bin'):
+                done.set()
+
+        threading.Thread(target=reader).start()
+        return done.wait(timeout=2)
+
+def run_file_stress(fi: FileInterface, versions: Dict[str, bytes], readers: int, writers: int,
+                    duration: float, with_delete: bool) -> Dict:
+    """Readers GET the shared file while writers replace (and delete) it
+
+    Every read must return exactly one complete version, or 'not found'.
+    """
+    contents = list(versions.values())
+    fi.upload(['shared.bin', contents[0], 'RAW'])
+    stop = time.time() + duration
+    counts = dict(reads=0, writes=0, deletes=0, missing=0, corrupt=0, errors=0)
+    counts_lock = threading.Lock()
+
+    def count(field):
+        with counts_lock:
+            counts[field] += 1
+
+    def reader(worker_id):
+        while time.time() < stop:
+            raw = worker_id % 2 == 0
+            hasil = fi.get_raw(['shared.bin']) if raw else fi.get(['shared.bin'])
+            if hasil['status'] != 'OK':
+                count('missing' if 'No such file' in hasil['data'] else 'errors')
+                continue
+            if raw:
+                stream = hasil['data_stream']
+                try:
+                    data = stream.read(hasil['data_size'])
+                finally:
+                    stream.close()
+            else:
+                data = base64.b64decode(hasil['data_file'])
+            count('reads' if hashlib.sha256(data).hexdigest() in versions else 'corrupt')
+
+    def writer(worker_id):
+        rng = random.Random(worker_id)
+        while time.time() < stop:
+            if with_delete and rng.random() < 0.02:
+                fi.delete(['shared.bin'])
+                count('deletes')
+                continue
+            hasil = fi.upload(['shared.bin', rng.choice(contents), 'RAW'])
+            count('writes' if hasil['status'] == 'OK' else 'errors')
+
+    with ThreadPoolExecutor(max_workers=readers + writers) as executor:
+        futures = [executor.submit(reader, i) for i in range(readers)]
+        futures += [executor.submit(writer, i) for i in range(writers)]
+        for future in futures:
+            future.result()
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description='Stress test per-file reader/writer locking')
+    parser.add_argument('--readers', type=int, default=16, help='Reader threads')
+    parser.add_argument('--writers', type=int, default=4, help='Writer threads')
+    parser.add_argument('--size-kb', type=int, default=512, help='Size of the shared file in KB')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds to run the file stress')
+    parser.add_argument('--cache-mb', type=int, default=0, help='Hot-file cache budget in MB (0 disables)')
+    parser.add_argument('--no-delete', action='store_true', help='Writers only replace, never delete')
+    args = parser.parse_args()
+
+    locks = FileLockManager()
+    results = {
+        'shared readers': check_shared_readers(locks, args.readers),
+        'exclusive writers': check_exclusive_writers(locks, args.writers + args.readers, 200),
+        'unrelated names': check_unrelated_names(locks),
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        cache = None
+        if args.cache_mb > 0:
+            from file_cache import FileCache
+            cache = FileCache(args.cache_mb * 1024 * 1024)
+        fi = FileInterface(fsync_policy='none', cache=cache)
+        versions = make_versions(args.size_kb * 1024)
+        counts = run_file_stress(fi, versions, args.readers, args.writers, args.duration,
+                                 not args.no_delete)
+        results['consistent reads'] = counts['corrupt'] == 0 and counts['errors'] == 0
+        # Every writer must have swapped in or removed its temp file
+        results['no temp files left'] = not [name for name in os.listdir('.') if name.endswith('.tmp')]
+        os.chdir('/')
+
+    print(f"\nReads: {counts['reads']}  Not found: {counts['missing']}  Corrupt: {counts['corrupt']}")
+    print(f"Writes: {counts['writes']}  Deletes: {counts['deletes']}  Errors: {counts['errors']}")
+    print(f"Lock stats: {fi.locks.stats()}")
+    print("-" * 80)
+    for name, ok in results.items():
+        print(f"{name:20s} {'OK' if ok else 'FAILED'}")
+    if not all(results.values()):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import logging
+import time
+import os
+import csv
+from datetime import datetime
+from typing import Dict, List
+from file_client_cli import FileClient, ConnectionPool
+import file_client_cli
+import gc
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Stream counts to compare for a single-file segmented download
+STREAM_COUNTS = [1, 4, 8]
+
+def run_segmented_test(filename: str, streams: int) -> Dict:
+    """Download one file split into `streams` concurrent ranged GETs"""
+    client = FileClient(file_client_cli.server_address, ConnectionPool(max_idle_per_address=streams))
+    output_path = f"segmented_{filename}"
+    start_time = time.time()
+    try:
+        hasil = client.get_segmented(filename, output_path, streams=streams)
+        success = hasil['status'] == 'OK'
+        file_size = hasil.get('data_size', 0) if success else 0
+    except Exception as e:
+        logging.error(f"Segmented download of {filename} with {streams} streams failed: {str(e)}")
+        success, file_size = False, 0
+    finally:
+        client.pool.close_all()
+        # Clean up downloaded file
+        try:
+            os.remove(output_path)
+        except:
+            pass
+        gc.collect()
+
+    total_time = time.time() - start_time
+    throughput = file_size / total_time if total_time > 0 else 0
+
+    return {
+        "filename": filename,
+        "streams": streams,
+        "total_time": total_time,
+        "throughput": throughput,
+        "success": success
+    }
+
+def save_results_to_csv(results: List[Dict], filename: str = None) -> None:
+    """Save segmented download results to a CSV file"""
+    if filename is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"stress_test_segmented_results_{timestamp}.csv"
+
+    headers = [
+        "Nomor",
+        "Volume",
+        "Jumlah Stream",
+        "Waktu Total (seconds)",
+        "Throughput (bytes/second)",
+        "Sukses"
+    ]
+
+    try:
+        with open(filename, 'w', newline='') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=headers)
+            writer.writeheader()
+
+            for idx, result in enumerate(results, 1):
+                row = {
+                    "Nomor": idx,
+                    "Volume": result['filename'],
+                    "Jumlah Stream": result['streams'],
+                    "Waktu Total (seconds)": f"{result['total_time']:.2f}",
+                    "Throughput (bytes/second)": f"{result['throughput']:.2f}",
+                    "Sukses": result['success']
+                }
+                writer.writerow(row)
+
+        logging.info(f"Results saved to {filename}")
+
+    except Exception as e:
+        logging.error(f"Error saving results to CSV: {str(e)}")
+
+def main():
+    file_sizes = ['test_10mb.bin', 'test_50mb.bin', 'test_100mb.bin']
+
+    results = []
+
+    for filename in file_sizes:
+        for streams in STREAM_COUNTS:
+            logging.info(f"Testing segmented download of {filename} with {streams} streams")
+
+            result = run_segmented_test(filename, streams)
+            results.append(result)
+
+            print(f"\nSegmented Results for {filename}:")
+            print(f"Streams: {streams}")
+            print(f"Total Time: {result['total_time']:.2f} seconds")
+            print(f"Throughput: {result['throughput']/1024/1024:.2f} MB/s")
+            print(f"Success: {result['success']}")
+            print("-" * 80)
+
+    save_results_to_csv(results)
+
+if __name__ == "__main__":
+    main()